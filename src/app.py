@@ -20,7 +20,11 @@ def main():
 
     # 3. Initialize Notification Manager (using setting)
     # This creates the ONE notification manager instance for the entire app
-    app_notification_manager = NotificationManager(settings_manager.get("enable_desktop_notifications"))
+    app_notification_manager = NotificationManager(settings_manager.get("enable_desktop_notifications"),
+                                                   webhook_url=settings_manager.get("run_hook_webhook_url", ""),
+                                                   post_run_command=settings_manager.get("run_hook_command", ""),
+                                                   event_timeout=settings_manager.get("event_timeout_seconds", 5),
+                                                   coalesce_seconds=settings_manager.get("notification_coalesce_seconds", 0.5))
 
     # Set the global log_manager instance for file_utils to use
     # This makes sure utility functions can access the main logger instance.
@@ -31,6 +35,8 @@ def main():
     app = MainWindow(settings_manager, app_log_manager, app_notification_manager)
     app.mainloop()
 
+    # Deliver notifications and run hooks still queued (bounded, the dispatcher thread won't block exit)
+    app_notification_manager.close(timeout=settings_manager.get("event_timeout_seconds", 5))
     app_log_manager.info("Application closed.")
 
 
@@ -0,0 +1,80 @@
+import argparse
+import queue
+import sys
+from src.core.log_manager import LogManager
+from src.core.notification_manager import NotificationManager
+from src.config.settings import SettingsManager
+from src.core.file_utils import set_global_log_manager
+from src.core.job_manager import JobManager, JOB_DONE
+
+def parse_args(argv=None):
+    """Parses command-line arguments for headless runs."""
+    parser = argparse.ArgumentParser(description="Organize files without the GUI. Several jobs can be queued at once.")
+    parser.add_argument("--job", nargs="+", action="append", required=True, metavar="ARG",
+                        help="SOURCE DESTINATION [PRIORITY]. Repeat for more jobs; higher priority runs first.")
+    parser.add_argument("--preview", action="store_true", help="Only report what would be done (What If mode).")
+    parser.add_argument("--duplicates", choices=["rename", "skip"], help="Duplicate handling (default: from config.json).")
+    parser.add_argument("--sort-by-date", choices=["None", "Year", "Year-Month", "Year-Month-Day"],
+                        help="Date subfolders (default: from config.json).")
+    args = parser.parse_args(argv)
+    for job_args in args.job:
+        if len(job_args) not in (2, 3):
+            parser.error("--job expects SOURCE DESTINATION [PRIORITY]")
+        if len(job_args) == 3 and not job_args[2].lstrip("-").isdigit():
+            parser.error(f"Job priority must be an integer, got '{job_args[2]}'")
+    return args
+
+def main(argv=None):
+    """
+    Runs one or more organize jobs through the JobManager and prints per-job progress
+    and final statistics. Returns a non-zero exit code if any job did not finish.
+    """
+    args = parse_args(argv)
+    settings_manager = SettingsManager()
+    app_log_manager = LogManager(settings_manager.get("log_file_path"))
+    set_global_log_manager(app_log_manager)
+    app_notification_manager = NotificationManager(settings_manager.get("enable_desktop_notifications"),
+                                                   webhook_url=settings_manager.get("run_hook_webhook_url", ""),
+                                                   post_run_command=settings_manager.get("run_hook_command", ""),
+                                                   event_timeout=settings_manager.get("event_timeout_seconds", 5),
+                                                   coalesce_seconds=settings_manager.get("notification_coalesce_seconds", 0.5))
+
+    log_queue = app_log_manager.get_queue() # Log lines already reach the console through the stream handler
+    job_manager = JobManager(log_queue, settings_manager, app_log_manager, app_notification_manager)
+    duplicate_handling = args.duplicates or settings_manager.get("duplicate_handling", "rename")
+    sort_by_date_format = args.sort_by_date or settings_manager.get("sort_by_date_format", "None")
+    for job_args in args.job:
+        priority = int(job_args[2]) if len(job_args) == 3 else 0
+        job_manager.submit(job_args[0], job_args[1], duplicate_handling, sort_by_date_format,
+                           preview_mode=args.preview, priority=priority)
+
+    try:
+        while job_manager.get_active_jobs() or not log_queue.empty():
+            try:
+                message_item = log_queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            msg_type = message_item.get("type")
+            if msg_type == "job_status":
+                print(f"[{message_item['job_id']}] {message_item['status']}")
+            elif msg_type == "progress" and message_item.get("done"):
+                print(f"[{message_item.get('job_id')}] {message_item.get('message', '')}")
+            elif msg_type == "preview_results":
+                for action in message_item.get("actions", []):
+                    print(f"[{message_item.get('job_id')}] {action}")
+    except KeyboardInterrupt:
+        print("Stopping all jobs...")
+        job_manager.cancel_all()
+        job_manager.wait()
+
+    all_done = True
+    for job in job_manager.get_jobs():
+        print(f"{job.job_id}: {job.status} {job.statistics or ''}")
+        all_done = all_done and job.status == JOB_DONE
+    # Let queued notifications and run hooks finish before the process exits
+    app_notification_manager.close(timeout=2 * settings_manager.get("event_timeout_seconds", 5))
+    return 0 if all_done else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -48,7 +48,30 @@ class SettingsManager:
             "enable_desktop_notifications": True,
             "log_file_path": "organizer_log.txt",
             "sort_by_date_format": "None", # Options: "None", "Year", "Year-Month", "Year-Month-Day"
-            "exclude_folders": [".git", "venv", "__pycache__", "node_modules", ".DS_Store"] # New default excluded folders
+            "exclude_folders": [".git", "venv", "__pycache__", "node_modules", ".DS_Store"], # New default excluded folders
+            "detect_similar_images": False, # Group resized/recompressed copies of the same image
+            "similar_image_threshold": 6, # Max differing bits (out of 64) for two images to count as similar
+            "pipeline_workers": {"metadata": 4, "execute": 2}, # Worker threads per pipeline stage
+            "pipeline_queue_size": 1000, # Max files waiting in front of each stage (backpressure)
+            "pipeline_batch_size": 64, # Files handed between stages at a time (at most; fewer when a stage is idle)
+            "metadata_cache_size": 200000, # Files whose embedded dates are remembered between runs
+            "preview_detail_limit": 10000, # Max per-file lines in the preview list; totals are always complete
+            "preview_sample_fraction": 1.0, # Below 1.0, preview plans only this share of folders and estimates bytes and renames
+            "max_concurrent_jobs": 2, # Jobs on unrelated folders that may run at the same time
+            "io_concurrency_limit": 8, # File reads/moves in flight across all running jobs
+            "remove_empty_source_dirs": False, # After organizing, delete source folders left empty by the run
+            "max_files_per_folder": 0, # 0 = no limit; otherwise full folders spill into hash-named bucket subfolders
+            "shard_prefix_length": 2, # Hex characters of the name hash per bucket level (2 -> up to 256 buckets)
+            "use_dir_fds": True, # Stat/move/mkdir relative to open folder handles where the OS supports it
+            "max_open_dir_fds": 64, # Folder handles kept open per run (least recently used are closed first)
+            "hardlink_policy": "all", # "all": move every link, "skip": move one and leave the rest, "relink": move one, re-link the rest
+            "symlink_policy": "move_link", # "move_link": move links as links, "skip": leave them, "follow": enter linked folders (loop-safe)
+            "enable_content_sniffing": False, # Classify files with unknown extensions by their first bytes (magic number)
+            "bulk_io_mode": "default", # "drop_behind": keep copies across drives and metadata reads out of the page cache
+            "run_hook_webhook_url": "", # e.g. "http://127.0.0.1:8080/organizer"; receives each run's summary as JSON
+            "run_hook_command": "", # Command run after each run with the summary as JSON on stdin
+            "event_timeout_seconds": 5, # Max time for one notification, webhook call or post-run command
+            "notification_coalesce_seconds": 0.5 # Notifications arriving within this window are merged into one
         }
 
     def _save_settings(self):
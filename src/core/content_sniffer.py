@@ -0,0 +1,102 @@
+SNIFF_BYTES = 512 # Every signature below lies within the first 512 bytes (tar's is at offset 257)
+ANY_BYTE = None # Wildcard position inside a signature pattern
+
+
+def _pattern(*parts):
+    """Builds a signature pattern: bytes are matched literally, an int n stands for n wildcard bytes."""
+    pattern = []
+    for part in parts:
+        if isinstance(part, int):
+            pattern.extend([ANY_BYTE] * part)
+        else:
+            pattern.extend(part)
+    return tuple(pattern)
+
+# (pattern, extension). The extension is mapped to a category through the configured
+# file_categories, so sniffed files land wherever a correctly named file would.
+# Where patterns share a prefix, the longest match wins (e.g. a QuickTime "ftypqt" over generic "ftyp").
+SIGNATURES = [
+    (_pattern(b"\xff\xd8\xff"), ".jpg"),
+    (_pattern(b"\x89PNG\r\n\x1a\n"), ".png"),
+    (_pattern(b"GIF87a"), ".gif"),
+    (_pattern(b"GIF89a"), ".gif"),
+    (_pattern(b"II*\x00"), ".tiff"),
+    (_pattern(b"MM\x00*"), ".tiff"),
+    (_pattern(b"RIFF", 4, b"WEBP"), ".webp"),
+    (_pattern(b"%PDF-"), ".pdf"),
+    (_pattern(b"{\\rtf"), ".rtf"),
+    (_pattern(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"), ".doc"), # OLE2 compound file (legacy Office)
+    (_pattern(b"PK\x03\x04"), ".zip"), # Also the container of docx/xlsx/odt; the bytes alone can't tell them apart
+    (_pattern(b"PK\x05\x06"), ".zip"), # Empty archive
+    (_pattern(b"Rar!\x1a\x07"), ".rar"),
+    (_pattern(b"7z\xbc\xaf\x27\x1c"), ".7z"),
+    (_pattern(b"\x1f\x8b"), ".gz"),
+    (_pattern(257, b"ustar"), ".tar"),
+    (_pattern(b"ID3"), ".mp3"),
+    (_pattern(b"fLaC"), ".flac"),
+    (_pattern(b"OggS"), ".ogg"),
+    (_pattern(b"RIFF", 4, b"WAVE"), ".wav"),
+    (_pattern(b"RIFF", 4, b"AVI "), ".avi"),
+    (_pattern(b"\x1a\x45\xdf\xa3"), ".mkv"),
+    (_pattern(b"FLV\x01"), ".flv"),
+    (_pattern(b"\x30\x26\xb2\x75\x8e\x66\xcf\x11"), ".wmv"), # ASF header GUID
+    (_pattern(4, b"ftyp"), ".mp4"),
+    (_pattern(4, b"ftypqt  "), ".mov"),
+    (_pattern(b"MZ"), ".exe"), # Only with a PE header behind it, see HEADER_CHECKS
+]
+
+
+def _has_pe_header(header):
+    """True if the DOS header's e_lfanew (offset 0x3C) points at a "PE\\0\\0" signature within the sniffed bytes."""
+    if len(header) < 0x40:
+        return False
+    pe_offset = int.from_bytes(header[0x3C:0x40], "little")
+    return header[pe_offset:pe_offset + 4] == b"PE\x00\x00"
+
+# extension -> check on the whole header, for signatures too short to trust on their own
+# (plenty of text starts with "MZ"). A match that fails its check is ignored.
+HEADER_CHECKS = {".exe": _has_pe_header}
+
+
+class SignatureTrie:
+    """
+    Prefix trie over signature patterns, built once. Matching walks the file header
+    byte by byte, following literal and wildcard edges, so the cost depends on the
+    header length rather than the number of signatures.
+    """
+    def __init__(self, signatures=SIGNATURES, header_checks=HEADER_CHECKS):
+        self._root = {}
+        self._header_checks = header_checks
+        for pattern, extension in signatures:
+            node = self._root
+            for byte in pattern:
+                node = node.setdefault(byte, {})
+            node["extension"] = extension
+
+    def match(self, header):
+        """Returns the extension of the longest signature that header starts with, or None."""
+        best_depth, best_extension = -1, None
+        stack = [(self._root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            extension = node.get("extension")
+            if extension is not None and depth > best_depth:
+                check = self._header_checks.get(extension)
+                if check is None or check(header):
+                    best_depth, best_extension = depth, extension
+            if depth >= len(header):
+                continue
+            for key in (header[depth], ANY_BYTE):
+                child = node.get(key)
+                if child is not None:
+                    stack.append((child, depth + 1))
+        return best_extension
+
+
+_DEFAULT_TRIE = SignatureTrie()
+
+def sniff_extension(file_path, trie=_DEFAULT_TRIE):
+    """Reads at most SNIFF_BYTES with a single read and returns the extension the content looks like, or None."""
+    with open(file_path, "rb", buffering=0) as f:
+        header = f.read(SNIFF_BYTES)
+    return trie.match(header)
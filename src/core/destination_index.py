@@ -0,0 +1,103 @@
+import os
+import threading
+import zlib
+
+SHARD_PREFIX = "_" # Marks bucket folders so they cannot clash with organized file names
+
+
+class DestinationIndex:
+    """
+    In-memory view of the destination tree used while planning moves.
+    Each destination directory is listed at most once; names of files that are
+    planned but not yet moved are reserved here, so later files in the same run
+    see them as taken even before they exist on disk.
+    """
+    def __init__(self):
+        self._directories = {} # normalized directory path -> set of normalized entry names
+        self._by_path = {} # directory path as given -> the same set, skipping normalization on repeat lookups
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(path):
+        # normcase folds case on Windows, where the filesystem is case-insensitive
+        return os.path.normcase(os.path.normpath(path))
+
+    def _get_entries(self, directory):
+        """Returns the cached entry set for a directory, listing it on first use."""
+        entries = self._by_path.get(directory)
+        if entries is not None:
+            return entries
+        key = self._normalize(directory)
+        entries = self._directories.get(key)
+        if entries is None:
+            try:
+                entries = {os.path.normcase(name) for name in os.listdir(directory)}
+            except (FileNotFoundError, NotADirectoryError):
+                entries = set() # Directory will be created when the first file is moved in
+            self._directories[key] = entries
+        self._by_path[directory] = entries
+        return entries
+
+    def exists(self, filepath):
+        """Returns True if the path exists on disk or has been reserved in this run."""
+        directory, name = os.path.split(filepath)
+        with self._lock:
+            return os.path.normcase(name) in self._get_entries(directory)
+
+    def reserve(self, filepath):
+        """Marks a path as taken by a planned move."""
+        directory, name = os.path.split(filepath)
+        with self._lock:
+            self._get_entries(directory).add(os.path.normcase(name))
+
+    def count(self, directory):
+        """Returns the number of entries (existing plus reserved) in a directory."""
+        with self._lock:
+            return len(self._get_entries(directory))
+
+    @staticmethod
+    def shard_settings(max_entries, prefix_length):
+        """
+        Returns (max_entries, prefix_length) adjusted so every folder can hold its bucket
+        folders plus at least one file: the prefix is shortened for small caps, and caps
+        too small for even 16 buckets are raised to 17.
+        """
+        prefix_length = max(1, int(prefix_length))
+        max_entries = max(16 + 1, int(max_entries))
+        while prefix_length > 1 and 16 ** prefix_length >= max_entries:
+            prefix_length -= 1
+        return max_entries, prefix_length
+
+    def get_shard_directory(self, directory, filename, max_entries, prefix_length=2):
+        """
+        Returns the folder a file should go to when folders are capped at max_entries.
+        Files fill `directory` until it is full, then spill into bucket subfolders named
+        after a hash prefix of the file name (e.g. '_3f'), nesting further if a bucket
+        fills up too. Room for the bucket folders themselves is kept within the cap, so
+        max_entries must exceed 16 ** prefix_length (see shard_settings()).
+        The buckets a name can be in are fixed by its hash, so before placing it the whole
+        chain of existing buckets is searched for the name: a file stored in a bucket by an
+        earlier run is still found as a duplicate after its parent folder gets room again.
+        """
+        digest = format(zlib.crc32(os.path.normcase(filename).encode("utf-8")), "08x")
+        buckets = [SHARD_PREFIX + digest[start:start + prefix_length]
+                   for start in range(0, len(digest) - prefix_length + 1, prefix_length)]
+        current = directory
+        for bucket in buckets:
+            if self.exists(os.path.join(current, filename)):
+                return current
+            current = os.path.join(current, bucket)
+            if not self.exists(current):
+                break # Deeper buckets can't exist either
+        else:
+            if self.exists(os.path.join(current, filename)):
+                return current
+
+        file_limit = max_entries - 16 ** prefix_length # Leave room for every possible bucket folder
+        current = directory
+        for bucket in buckets:
+            if self.count(current) < file_limit:
+                return current
+            current = os.path.join(current, bucket)
+            self.reserve(current) # Count the bucket folder as an entry of its parent
+        return current # Hash exhausted: deepest bucket takes the file regardless of size
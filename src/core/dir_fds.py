@@ -0,0 +1,164 @@
+import contextlib
+import errno
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+# Directory-relative system calls (openat/fstatat/renameat/mkdirat/linkat/unlinkat) are POSIX-only.
+# On other platforms every helper below falls back to plain path-based calls.
+SUPPORTS_DIR_FD = (hasattr(os, "O_DIRECTORY") and os.stat in os.supports_dir_fd
+                   and os.rename in os.supports_dir_fd and os.mkdir in os.supports_dir_fd
+                   and os.rmdir in os.supports_dir_fd and os.link in os.supports_dir_fd
+                   and os.unlink in os.supports_dir_fd and os.open in os.supports_dir_fd)
+
+
+class DirectoryFdCache:
+    """
+    LRU cache of open directory file descriptors.
+    Operations on a file can then name it relative to its directory's descriptor,
+    so the kernel does not re-resolve every component of a long absolute path.
+    Descriptors in use by a thread are never closed; eviction skips them, so the
+    cache may briefly hold more than max_open entries under heavy concurrency.
+    """
+    def __init__(self, max_open=64):
+        self.max_open = max(1, max_open)
+        self._entries = OrderedDict() # directory path -> [fd, users]
+        self._lock = threading.Lock()
+        self.opened = 0 # Directories opened (cache misses)
+        self.reused = 0 # Operations served by an already open descriptor
+
+    @contextlib.contextmanager
+    def open_directory(self, directory):
+        """Context manager yielding an open descriptor for directory."""
+        fd = self._acquire(directory)
+        try:
+            yield fd
+        finally:
+            self._release(directory)
+
+    def close_all(self):
+        """Closes every cached descriptor. Call once no operation is using the cache."""
+        with self._lock:
+            for fd, _ in self._entries.values():
+                os.close(fd)
+            self._entries.clear()
+
+    def _acquire(self, directory):
+        with self._lock:
+            entry = self._entries.get(directory)
+            if entry is not None:
+                entry[1] += 1
+                self._entries.move_to_end(directory)
+                self.reused += 1
+                return entry[0]
+            parent, name = os.path.split(directory)
+            parent_entry = self._entries.get(parent)
+            if parent_entry is not None and name:
+                # Open relative to the already open parent: one path component to resolve
+                fd = os.open(name, os.O_RDONLY | os.O_DIRECTORY, dir_fd=parent_entry[0])
+            else:
+                fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            self._entries[directory] = [fd, 1]
+            self.opened += 1
+            self._evict()
+            return fd
+
+    def _release(self, directory):
+        with self._lock:
+            self._entries[directory][1] -= 1
+            self._evict()
+
+    def _evict(self):
+        """Closes least recently used idle descriptors until the cache is within max_open. Caller holds the lock."""
+        if len(self._entries) <= self.max_open:
+            return
+        for directory in list(self._entries):
+            fd, users = self._entries[directory]
+            if users == 0:
+                os.close(fd)
+                del self._entries[directory]
+                if len(self._entries) <= self.max_open:
+                    return
+
+
+def stat_file(fd_cache, path):
+    """os.stat() relative to the file's directory descriptor when a cache is given."""
+    if fd_cache is None:
+        return os.stat(path)
+    directory, name = os.path.split(path)
+    with fd_cache.open_directory(directory) as dir_fd:
+        return os.stat(name, dir_fd=dir_fd)
+
+def make_directories(fd_cache, path):
+    """
+    Like os.makedirs(path, exist_ok=True), creating each level relative to its parent's
+    descriptor. Returns True if path was created, False if it already existed.
+    """
+    if fd_cache is None:
+        if os.path.isdir(path):
+            return False
+        os.makedirs(path, exist_ok=True)
+        return True
+    parent, name = os.path.split(path)
+    try:
+        with fd_cache.open_directory(parent) as parent_fd:
+            os.mkdir(name, dir_fd=parent_fd)
+        return True
+    except FileExistsError:
+        return False
+    except FileNotFoundError:
+        make_directories(fd_cache, parent) # Parent is missing: create it, then retry once
+    try:
+        with fd_cache.open_directory(parent) as parent_fd:
+            os.mkdir(name, dir_fd=parent_fd)
+        return True
+    except FileExistsError:
+        return False
+
+def remove_directory(fd_cache, path):
+    """os.rmdir() relative to the parent directory's descriptor when a cache is given."""
+    if fd_cache is None:
+        os.rmdir(path)
+        return
+    parent, name = os.path.split(path)
+    with fd_cache.open_directory(parent) as parent_fd:
+        os.rmdir(name, dir_fd=parent_fd)
+
+def link_file(fd_cache, existing_path, new_path):
+    """os.link() relative to the directory descriptors of both paths when a cache is given."""
+    if fd_cache is None:
+        os.link(existing_path, new_path)
+        return
+    existing_dir, existing_name = os.path.split(existing_path)
+    new_dir, new_name = os.path.split(new_path)
+    with fd_cache.open_directory(existing_dir) as existing_fd, fd_cache.open_directory(new_dir) as new_fd:
+        os.link(existing_name, new_name, src_dir_fd=existing_fd, dst_dir_fd=new_fd)
+
+def remove_file(fd_cache, path):
+    """os.unlink() relative to the parent directory's descriptor when a cache is given."""
+    if fd_cache is None:
+        os.unlink(path)
+        return
+    directory, name = os.path.split(path)
+    with fd_cache.open_directory(directory) as dir_fd:
+        os.unlink(name, dir_fd=dir_fd)
+
+def move_file(fd_cache, source_path, destination_path, copy_function=shutil.copy2):
+    """
+    Moves a file like shutil.move(). With a cache, a same-filesystem move is a single
+    rename between the two directory descriptors; cross-device moves fall back to shutil,
+    which copies with copy_function and then deletes the source.
+    """
+    if fd_cache is None:
+        shutil.move(source_path, destination_path, copy_function=copy_function)
+        return
+    source_dir, source_name = os.path.split(source_path)
+    destination_dir, destination_name = os.path.split(destination_path)
+    try:
+        with fd_cache.open_directory(source_dir) as source_fd, fd_cache.open_directory(destination_dir) as destination_fd:
+            os.rename(source_name, destination_name, src_dir_fd=source_fd, dst_dir_fd=destination_fd)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(source_path, destination_path, copy_function=copy_function) # Different filesystem: copy, then delete the source
@@ -65,29 +65,41 @@ def get_exif_date_taken(image_path):
         get_log_manager().warning(f"Could not extract EXIF date from '{image_path}': {e}")
     return None
 
-def resolve_duplicate_filepath(filepath, handling_method="rename"):
+def resolve_duplicate_filepath(filepath, handling_method="rename", destination_index=None, place_filepath=None):
     """
     Resolves duplicate file paths based on the specified handling method.
     If 'rename', appends (n) before the extension.
     If 'skip', returns None (indicating the file should be skipped).
+    If a DestinationIndex is given, existence checks use it instead of the disk and
+    the returned path is reserved in it.
+    place_filepath, if given, maps each candidate path to where that name is actually
+    stored (e.g. a bucket subfolder when folders are sharded).
     """
-    if not os.path.exists(filepath):
-        return filepath # No duplicate, safe to use
+    path_exists = destination_index.exists if destination_index is not None else os.path.exists
+    if place_filepath is None:
+        place_filepath = lambda path: path
 
-    if handling_method == "skip":
+    placed_filepath = place_filepath(filepath)
+    if not path_exists(placed_filepath):
+        resolved_filepath = placed_filepath # No duplicate, safe to use
+    elif handling_method == "skip":
         get_log_manager().info(f"Skipping '{os.path.basename(filepath)}' due to duplicate existing.")
         return None
     elif handling_method == "rename":
         base, ext = os.path.splitext(filepath)
         counter = 1
-        new_filepath = f"{base} ({counter}){ext}"
+        new_filepath = place_filepath(f"{base} ({counter}){ext}")
         # Loop until a unique filename is found
-        while os.path.exists(new_filepath):
+        while path_exists(new_filepath):
             counter += 1
-            new_filepath = f"{base} ({counter}){ext}"
+            new_filepath = place_filepath(f"{base} ({counter}){ext}")
         get_log_manager().info(f"Renaming '{os.path.basename(filepath)}' to '{os.path.basename(new_filepath)}' due to duplicate.")
-        return new_filepath
+        resolved_filepath = new_filepath
     else:
         # Default to rename if handling_method is unknown or invalid
         get_log_manager().warning(f"Unknown duplicate handling method '{handling_method}'. Defaulting to 'rename'.")
-        return resolve_duplicate_filepath(filepath, "rename")
\ No newline at end of file
+        return resolve_duplicate_filepath(filepath, "rename", destination_index, place_filepath)
+
+    if destination_index is not None:
+        destination_index.reserve(resolved_filepath)
+    return resolved_filepath
@@ -0,0 +1,118 @@
+from PIL import Image # Requires Pillow
+from src.core.file_utils import get_log_manager
+
+HASH_SIZE = 8 # 8x8 comparisons -> 64-bit hash
+
+
+def compute_dhash(image_path, hash_size=HASH_SIZE):
+    """
+    Computes a difference hash (dHash) for an image and returns it as an int.
+    Resized or recompressed copies of the same picture produce hashes that differ
+    in only a few bits. Returns None if the image cannot be decoded.
+    """
+    try:
+        with Image.open(image_path) as img:
+            # draft() lets the JPEG decoder scale down by 1/2..1/8 while decoding,
+            # so we never materialize the full-resolution bitmap. No-op for other formats.
+            img.draft("L", (hash_size * 4, hash_size * 4))
+            small = img.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+            pixels = list(small.getdata())
+    except Exception as e:
+        get_log_manager().warning(f"Could not compute image hash for '{image_path}': {e}")
+        return None
+
+    # Each bit records whether a pixel is brighter than its right-hand neighbour
+    hash_value = 0
+    row_width = hash_size + 1
+    for row in range(hash_size):
+        offset = row * row_width
+        for col in range(hash_size):
+            hash_value = (hash_value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return hash_value
+
+def hamming_distance(hash_a, hash_b):
+    """Returns the number of differing bits between two hashes."""
+    return bin(hash_a ^ hash_b).count("1")
+
+
+class BKTree:
+    """
+    A Burkhard-Keller tree over integer hashes using Hamming distance.
+    Lookups within a small radius only visit a fraction of the tree instead of
+    comparing against every stored hash.
+    """
+    def __init__(self):
+        # Each node is [hash, item, children] where children maps distance -> node.
+        # children stays None for leaves to keep per-node memory small.
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, hash_value, item):
+        """Inserts a hash and its associated item into the tree."""
+        new_node = [hash_value, item, None]
+        self._size += 1
+        if self._root is None:
+            self._root = new_node
+            return
+        node = self._root
+        while True:
+            distance = hamming_distance(hash_value, node[0])
+            if node[2] is None:
+                node[2] = {}
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = new_node
+                return
+            node = child
+
+    def find(self, hash_value, max_distance):
+        """Returns a list of (distance, item) for all stored hashes within max_distance."""
+        results = []
+        if self._root is None:
+            return results
+        pending = [self._root]
+        while pending:
+            node = pending.pop()
+            distance = hamming_distance(hash_value, node[0])
+            if distance <= max_distance:
+                results.append((distance, node[1]))
+            if node[2]:
+                # Triangle inequality: only subtrees in [d - r, d + r] can contain matches
+                low = distance - max_distance
+                high = distance + max_distance
+                for child_distance, child in node[2].items():
+                    if low <= child_distance <= high:
+                        pending.append(child)
+        return results
+
+
+class SimilarImageIndex:
+    """
+    Groups perceptually similar images as they are discovered.
+    Only the first image of each group is inserted into the BK-tree, so memory
+    grows with the number of distinct pictures rather than the number of files.
+    """
+    def __init__(self, max_distance=6):
+        self.max_distance = max_distance
+        self._tree = BKTree()
+        self._groups = {} # representative path -> list of (path, distance)
+
+    def add(self, image_path, hash_value):
+        """
+        Registers an image. Returns the representative path of the group it joined,
+        or None if it is the first image of a new group.
+        """
+        matches = self._tree.find(hash_value, self.max_distance)
+        if matches:
+            distance, representative = min(matches, key=lambda match: match[0])
+            self._groups.setdefault(representative, []).append((image_path, distance))
+            return representative
+        self._tree.add(hash_value, image_path)
+        return None
+
+    def get_groups(self):
+        """Returns a list of (representative, [(path, distance), ...]) for groups with duplicates."""
+        return list(self._groups.items())
@@ -0,0 +1,196 @@
+import itertools
+import os
+import threading
+from src.core.organizer import FileOrganizer
+from src.core.metadata_cache import MetadataCache
+# Import manager classes for type hinting/understanding, instances are passed
+from src.core.log_manager import LogManager
+from src.core.notification_manager import NotificationManager
+
+# Job states, in the order a job normally goes through them
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_CANCELLED = "cancelled"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_DONE, JOB_CANCELLED, JOB_FAILED)
+
+
+def paths_overlap(path_a, path_b):
+    """Returns True if two directories are the same or one contains the other."""
+    path_a = os.path.normcase(os.path.realpath(path_a))
+    path_b = os.path.normcase(os.path.realpath(path_b))
+    if path_a == path_b:
+        return True
+    return path_a.startswith(path_b.rstrip(os.sep) + os.sep) or path_b.startswith(path_a.rstrip(os.sep) + os.sep)
+
+
+class OrganizeJob:
+    """One source -> destination organize (or preview) request managed by the JobManager."""
+    def __init__(self, job_id, sequence, source_dir, destination_dir, duplicate_handling, sort_by_date_format, preview_mode, priority):
+        self.job_id = job_id
+        self.sequence = sequence # Submission order, breaks ties between equal priorities
+        self.source_dir = source_dir
+        self.destination_dir = destination_dir
+        self.duplicate_handling = duplicate_handling
+        self.sort_by_date_format = sort_by_date_format
+        self.preview_mode = preview_mode
+        self.priority = priority # Higher runs first
+        self.status = JOB_QUEUED
+        self.statistics = None # Final run statistics, set when the job finishes
+        self.organizer = None
+        self.finished = threading.Event()
+
+    def overlaps(self, other):
+        """Returns True if the two jobs touch a common part of the filesystem."""
+        return any(paths_overlap(mine, theirs)
+                   for mine in (self.source_dir, self.destination_dir)
+                   for theirs in (other.source_dir, other.destination_dir))
+
+    def to_dict(self):
+        """Returns a plain-dict view of the job for the GUI queue and the CLI."""
+        return {"job_id": self.job_id, "source_dir": self.source_dir, "destination_dir": self.destination_dir,
+                "preview_mode": self.preview_mode, "priority": self.priority, "status": self.status,
+                "statistics": self.statistics}
+
+
+class JobQueue:
+    """Queue facade handed to a job's FileOrganizer; tags every message with the job id."""
+    def __init__(self, target_queue, job_id):
+        self._target_queue = target_queue
+        self._job_id = job_id
+
+    def put(self, item):
+        self._target_queue.put(dict(item, job_id=self._job_id))
+
+
+class JobManager:
+    """
+    Queues organize jobs and runs them in priority order.
+    Jobs whose source or destination trees overlap are serialized; independent jobs
+    run concurrently, up to max_concurrent_jobs, and share a global I/O budget
+    (a semaphore limiting simultaneous file reads and moves across all jobs).
+    Job state changes are reported on the log queue as "job_status" messages.
+    """
+    def __init__(self, log_queue, settings, app_log_manager: LogManager, app_notification_manager: NotificationManager):
+        self.log_queue = log_queue
+        self.settings = settings
+        self.app_log_manager = app_log_manager
+        self.app_notification_manager = app_notification_manager
+        self.max_concurrent_jobs = max(1, int(settings.get("max_concurrent_jobs", 2)))
+        self._io_limiter = threading.BoundedSemaphore(max(1, int(settings.get("io_concurrency_limit", 8))))
+        self._metadata_cache = MetadataCache(settings.get("metadata_cache_size", 200000)) # Shared by all jobs
+        self._jobs = {} # job_id -> OrganizeJob, in submission order
+        self._queued = []
+        self._running = []
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, source_dir, destination_dir, duplicate_handling="rename", sort_by_date_format="None",
+               preview_mode=False, priority=0, job_id=None):
+        """Queues a job and returns its id. Raises ValueError if job_id is already in use."""
+        with self._lock:
+            sequence = next(self._sequence)
+            job_id = job_id or f"job-{sequence}"
+            if job_id in self._jobs:
+                raise ValueError(f"A job with id '{job_id}' already exists.")
+            job = OrganizeJob(job_id, sequence, source_dir, destination_dir, duplicate_handling, sort_by_date_format, preview_mode, priority)
+            self._jobs[job_id] = job
+            self._queued.append(job)
+            self._post_status(job)
+            self.app_log_manager.info(f"Queued {'preview' if preview_mode else 'organize'} job '{job_id}' (priority {priority}): '{source_dir}' -> '{destination_dir}'")
+            self._schedule()
+        return job_id
+
+    def cancel(self, job_id):
+        """Cancels a queued job, or asks a running job to stop. Returns False for unknown or finished jobs."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                return False
+            if job.status == JOB_QUEUED:
+                self._queued.remove(job)
+                self._finish(job, JOB_CANCELLED)
+                self._schedule() # Jobs held back behind this one may start now
+            elif job.organizer is not None:
+                job.organizer.stop()
+            return True
+
+    def cancel_all(self):
+        """Cancels every queued and running job."""
+        for job_id in [job.job_id for job in self.get_active_jobs()]:
+            self.cancel(job_id)
+
+    def get_job(self, job_id):
+        """Returns the OrganizeJob with this id, or None."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_jobs(self):
+        """Returns all jobs in submission order."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def get_active_jobs(self):
+        """Returns queued and running jobs."""
+        with self._lock:
+            return [job for job in self._jobs.values() if job.status not in FINISHED_STATES]
+
+    def wait(self, job_ids=None, timeout=None):
+        """Blocks until the given jobs (default: all submitted jobs) have finished. Returns True if they all did."""
+        jobs = [self.get_job(job_id) for job_id in job_ids] if job_ids is not None else self.get_jobs()
+        return all(job.finished.wait(timeout) for job in jobs if job is not None)
+
+    def _schedule(self):
+        """
+        Starts every queued job that fits the concurrency limit and does not overlap
+        a running job or a higher-priority queued job. Caller must hold self._lock.
+        """
+        blocking_jobs = list(self._running)
+        for job in sorted(self._queued, key=lambda queued_job: (-queued_job.priority, queued_job.sequence)):
+            if len(self._running) >= self.max_concurrent_jobs:
+                break
+            if any(job.overlaps(other) for other in blocking_jobs):
+                blocking_jobs.append(job) # Later jobs on the same paths must wait behind this one
+                continue
+            self._queued.remove(job)
+            self._start(job)
+            blocking_jobs.append(job)
+
+    def _start(self, job):
+        """Creates the job's organizer and runs it on its own thread. Caller must hold self._lock."""
+        job.organizer = FileOrganizer(JobQueue(self.log_queue, job.job_id), self.settings, self.app_log_manager, self.app_notification_manager,
+                                      metadata_cache=self._metadata_cache, io_limiter=self._io_limiter)
+        job.status = JOB_RUNNING
+        self._running.append(job)
+        self._post_status(job)
+        thread = threading.Thread(target=self._run_job, args=(job,), name=f"job-runner-{job.job_id}")
+        thread.daemon = True # Allow main program to exit even if a job is running
+        thread.start()
+
+    def _run_job(self, job):
+        """Thread body for one job."""
+        final_status = JOB_FAILED
+        try:
+            job.organizer._organize_files(job.source_dir, job.destination_dir, job.duplicate_handling,
+                                          job.sort_by_date_format, job.preview_mode)
+            job.statistics = job.organizer.last_statistics
+            if job.statistics is not None: # None means the run was rejected (e.g. invalid paths)
+                final_status = JOB_CANCELLED if job.statistics.get("stopped") else JOB_DONE
+        except Exception as e:
+            self.app_log_manager.error(f"Job '{job.job_id}' failed: {e}")
+        with self._lock:
+            self._running.remove(job)
+            self._finish(job, final_status)
+            self._schedule()
+
+    def _finish(self, job, status):
+        """Records a job's final state and wakes waiters. Caller must hold self._lock."""
+        job.status = status
+        job.organizer = None # Release the run's buffers
+        self._post_status(job)
+        job.finished.set()
+
+    def _post_status(self, job):
+        """Reports a job state change on the log queue."""
+        self.log_queue.put(dict(job.to_dict(), type="job_status"))
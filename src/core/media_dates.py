@@ -0,0 +1,332 @@
+"""
+Lightweight creation-date readers for video and audio containers.
+Each parser seeks straight to the structure holding the date and reads only
+a few small headers, so even multi-gigabyte videos cost a handful of reads.
+"""
+import struct
+from datetime import datetime, timedelta, timezone
+
+MP4_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc) # QuickTime/MP4 timestamps count from 1904
+MKV_EPOCH = datetime(2001, 1, 1, tzinfo=timezone.utc) # Matroska DateUTC counts nanoseconds from 2001
+MAX_ID3_FRAMES = 64 # Give up on ID3 tags with more frames than this before a date frame
+MAX_DATE_TEXT = 64 # Bytes of a date tag worth reading; longer frames are malformed or not plain dates
+
+MP4_TOP_LEVEL_ATOMS = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot", b"uuid"}
+MKV_SEGMENT_ID = 0x18538067
+MKV_INFO_ID = 0x1549A966
+MKV_DATE_UTC_ID = 0x4461
+MKV_CLUSTER_ID = 0x1F43B675
+
+# Tag date layouts, most specific first, with the length of text each one consumes
+TAG_DATE_FORMATS = (("%Y-%m-%d %H:%M:%S", 19), ("%Y-%m-%d %H:%M", 16), ("%Y-%m-%d", 10), ("%Y-%m", 7), ("%Y", 4))
+
+
+class _CountingReader:
+    """Wraps a binary file and counts how many bytes were actually read from it."""
+    def __init__(self, file_obj):
+        self._file = file_obj
+        self.bytes_read = 0
+
+    def read(self, size):
+        data = self._file.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+
+def read_media_creation_date(file_path):
+    """
+    Returns (datetime or None, bytes_read) for an MP4/MOV, MKV/WebM, MP3 (ID3v2) or FLAC file.
+    The container is recognised from its first bytes, not its extension.
+    Dates are returned as naive local times, like the EXIF and filesystem dates.
+    """
+    with open(file_path, "rb") as f:
+        reader = _CountingReader(f)
+        header = reader.read(12)
+        file_date = None
+        if header[:3] == b"ID3":
+            file_date = _read_id3_date(reader, header)
+        elif header[:4] == b"fLaC":
+            file_date = _read_flac_date(reader)
+        elif header[:4] == b"\x1a\x45\xdf\xa3":
+            file_date = _read_mkv_date(reader)
+        elif header[4:8] in MP4_TOP_LEVEL_ATOMS:
+            file_date = _read_mp4_date(reader)
+        return file_date, reader.bytes_read
+
+def _to_local_naive(utc_datetime):
+    """Converts an aware UTC datetime to the naive local time used elsewhere in the app."""
+    return utc_datetime.astimezone().replace(tzinfo=None)
+
+def _parse_date_text(text):
+    """Parses tag dates such as '2021', '2021-07-04' or '2021-07-04T18:30:00'. Returns None if invalid."""
+    text = text.strip().strip("\x00").replace("T", " ")
+    for date_format, text_length in TAG_DATE_FORMATS:
+        try:
+            return datetime.strptime(text[:text_length], date_format)
+        except ValueError:
+            continue
+    return None
+
+
+# --- MP4 / MOV ---
+
+def _read_mp4_date(reader):
+    """Walks atom headers to moov/mvhd and returns its creation time."""
+    reader.seek(0)
+    moov_end = _find_mp4_atom(reader, b"moov", end=None)
+    if moov_end is None:
+        return None
+    if _find_mp4_atom(reader, b"mvhd", end=moov_end) is None:
+        return None
+    version = reader.read(4)[:1] # version (1 byte) + flags (3 bytes)
+    if version == b"\x01":
+        data = reader.read(8)
+        if len(data) < 8:
+            return None
+        seconds = struct.unpack(">Q", data)[0]
+    else:
+        data = reader.read(4)
+        if len(data) < 4:
+            return None
+        seconds = struct.unpack(">I", data)[0]
+    if seconds == 0:
+        return None # Unset by the muxer
+    try:
+        return _to_local_naive(MP4_EPOCH + timedelta(seconds=seconds))
+    except OverflowError:
+        return None
+
+def _find_mp4_atom(reader, atom_type, end):
+    """
+    Scans sibling atoms from the current position until `atom_type` is found.
+    Leaves the reader at the start of the atom's payload and returns the atom's end offset.
+    """
+    position = reader.tell()
+    while end is None or position + 8 <= end:
+        header = reader.read(8)
+        if len(header) < 8:
+            return None
+        size, current_type = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1: # 64-bit extended size follows
+            extended = reader.read(8)
+            if len(extended) < 8:
+                return None
+            size = struct.unpack(">Q", extended)[0]
+            header_size = 16
+        elif size == 0: # Atom extends to the end of the file (or parent)
+            if current_type == atom_type:
+                return end if end is not None else float("inf")
+            return None
+        if size < header_size:
+            return None # Corrupt atom
+        if current_type == atom_type:
+            return position + size
+        position += size
+        reader.seek(position)
+    return None
+
+
+# --- Matroska / WebM ---
+
+def _read_ebml_id(reader):
+    """Reads an EBML element ID (1-4 bytes, marker bits kept). Returns None at EOF."""
+    first = reader.read(1)
+    if not first:
+        return None
+    length = _ebml_length(first[0], 4)
+    if length is None:
+        return None
+    rest = reader.read(length - 1)
+    if len(rest) < length - 1:
+        return None
+    return int.from_bytes(first + rest, "big")
+
+def _read_ebml_size(reader):
+    """Reads an EBML data size (1-8 bytes). Returns (size, is_unknown) or (None, False) at EOF."""
+    first = reader.read(1)
+    if not first:
+        return None, False
+    length = _ebml_length(first[0], 8)
+    if length is None:
+        return None, False
+    rest = reader.read(length - 1)
+    if len(rest) < length - 1:
+        return None, False
+    value = first[0] & (0xFF >> length)
+    for byte in rest:
+        value = (value << 8) | byte
+    is_unknown = value == (1 << (7 * length)) - 1 # All data bits set means "unknown size"
+    return value, is_unknown
+
+def _ebml_length(first_byte, max_length):
+    """Returns the byte length encoded by the leading zero bits of a varint, or None if invalid."""
+    for length in range(1, max_length + 1):
+        if first_byte & (0x80 >> (length - 1)):
+            return length
+    return None
+
+def _read_mkv_date(reader):
+    """Walks EBML -> Segment -> Info and returns DateUTC."""
+    reader.seek(0)
+    # Skip the EBML header element
+    if _read_ebml_id(reader) is None:
+        return None
+    size, _ = _read_ebml_size(reader)
+    if size is None:
+        return None
+    reader.seek(reader.tell() + size)
+
+    if _read_ebml_id(reader) != MKV_SEGMENT_ID:
+        return None
+    _read_ebml_size(reader) # Segment usually spans the rest of the file; its size is not needed
+
+    # Info sits near the start of the segment; skip other top-level elements by seeking
+    while True:
+        element_id = _read_ebml_id(reader)
+        size, is_unknown = _read_ebml_size(reader)
+        if element_id is None or size is None:
+            return None
+        if element_id == MKV_INFO_ID:
+            info_end = None if is_unknown else reader.tell() + size
+            break
+        if is_unknown or element_id == MKV_CLUSTER_ID:
+            return None # Reached media data (or cannot skip); no Info before it
+        reader.seek(reader.tell() + size)
+
+    while info_end is None or reader.tell() < info_end:
+        element_id = _read_ebml_id(reader)
+        size, is_unknown = _read_ebml_size(reader)
+        if element_id is None or size is None or is_unknown:
+            return None
+        if element_id == MKV_DATE_UTC_ID:
+            if size != 8: # Checked before reading: the size comes straight from the file
+                return None
+            data = reader.read(8)
+            if len(data) < 8:
+                return None
+            nanoseconds = struct.unpack(">q", data)[0]
+            try:
+                return _to_local_naive(MKV_EPOCH + timedelta(microseconds=nanoseconds // 1000))
+            except OverflowError:
+                return None
+        reader.seek(reader.tell() + size)
+    return None
+
+
+# --- ID3v2 (MP3) ---
+
+def _syncsafe_int(data):
+    """Decodes an ID3 'syncsafe' integer (7 significant bits per byte)."""
+    value = 0
+    for byte in data:
+        value = (value << 7) | (byte & 0x7F)
+    return value
+
+def _decode_id3_text(payload):
+    """Decodes an ID3 text frame payload (encoding byte followed by text)."""
+    if not payload:
+        return ""
+    encoding = payload[0]
+    text = payload[1:]
+    codec = {0: "latin-1", 1: "utf-16", 2: "utf-16-be", 3: "utf-8"}.get(encoding, "latin-1")
+    return text.decode(codec, errors="ignore").split("\x00")[0]
+
+def _read_id3_date(reader, header):
+    """Reads frame headers of an ID3v2 tag, seeking over everything except date frames."""
+    reader.seek(10)
+    tag_header = header[:10] if len(header) >= 10 else b""
+    if len(tag_header) < 10:
+        return None
+    major_version = tag_header[3]
+    flags = tag_header[5]
+    tag_end = 10 + _syncsafe_int(tag_header[6:10])
+    if flags & 0x40 and major_version >= 3: # Extended header present
+        ext_size_bytes = reader.read(4)
+        if len(ext_size_bytes) < 4:
+            return None # Truncated tag
+        ext_size = _syncsafe_int(ext_size_bytes) if major_version == 4 else struct.unpack(">I", ext_size_bytes)[0] + 4
+        reader.seek(10 + ext_size)
+
+    if major_version == 2:
+        id_length, header_length, date_frames = 3, 6, {b"TYE": "year", b"TDA": "daymonth"}
+    else:
+        id_length, header_length = 4, 10
+        date_frames = {b"TDRC": "full", b"TDOR": "full", b"TYER": "year", b"TDAT": "daymonth"}
+
+    found = {}
+    for _ in range(MAX_ID3_FRAMES):
+        position = reader.tell()
+        if position + header_length > tag_end:
+            break
+        frame_header = reader.read(header_length)
+        frame_id = frame_header[:id_length]
+        if len(frame_header) < header_length or not frame_id.strip(b"\x00"):
+            break # Padding reached
+        size_bytes = frame_header[id_length:id_length + (3 if major_version == 2 else 4)]
+        if major_version == 4:
+            frame_size = _syncsafe_int(size_bytes)
+        else:
+            frame_size = int.from_bytes(size_bytes, "big")
+        if position + header_length + frame_size > tag_end:
+            break # Frame runs past the tag: malformed
+        kind = date_frames.get(frame_id)
+        if kind:
+            found[kind] = _decode_id3_text(reader.read(min(frame_size, MAX_DATE_TEXT)))
+            if kind == "full":
+                break
+        reader.seek(position + header_length + frame_size)
+
+    if "full" in found:
+        return _parse_date_text(found["full"])
+    if "year" in found:
+        year = found["year"].strip()
+        day_month = found.get("daymonth", "").strip()
+        if len(day_month) == 4 and day_month.isdigit(): # TDAT is stored as DDMM
+            return _parse_date_text(f"{year}-{day_month[2:]}-{day_month[:2]}")
+        return _parse_date_text(year)
+    return None
+
+
+# --- FLAC ---
+
+def _read_flac_date(reader):
+    """Walks FLAC metadata block headers to the Vorbis comment block and returns its DATE."""
+    reader.seek(4)
+    while True:
+        block_header = reader.read(4)
+        if len(block_header) < 4:
+            return None
+        is_last = block_header[0] & 0x80
+        block_type = block_header[0] & 0x7F
+        block_length = int.from_bytes(block_header[1:4], "big")
+        if block_type == 4: # VORBIS_COMMENT
+            return _parse_vorbis_comment_date(reader.read(block_length)) # 24-bit length, at most 16 MB
+        if is_last:
+            return None
+        reader.seek(reader.tell() + block_length)
+
+def _parse_vorbis_comment_date(block):
+    """Finds DATE= in a Vorbis comment block (little-endian length-prefixed strings)."""
+    try:
+        vendor_length = struct.unpack_from("<I", block, 0)[0]
+        offset = 4 + vendor_length
+        comment_count = struct.unpack_from("<I", block, offset)[0]
+        offset += 4
+        for _ in range(comment_count):
+            comment_length = struct.unpack_from("<I", block, offset)[0]
+            offset += 4
+            comment = block[offset:offset + comment_length].decode("utf-8", errors="ignore")
+            offset += comment_length
+            key, _, value = comment.partition("=")
+            if key.upper() == "DATE":
+                return _parse_date_text(value)
+    except struct.error:
+        pass # Truncated block
+    return None
@@ -0,0 +1,38 @@
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class MetadataCache:
+    """
+    Thread-safe LRU cache for per-file metadata (dates, content types, ...).
+    Entries are keyed by the file's identity and version, (device, inode, size, mtime),
+    so a renamed or moved file keeps its entry while a modified file misses.
+    """
+    def __init__(self, max_entries=200000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(stat_result, kind):
+        """Builds a cache key for one kind of metadata from an os.stat() result."""
+        return (kind, stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+
+    def lookup(self, key):
+        """Returns (True, value) if key is cached (value may itself be None), else (False, None)."""
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def put(self, key, value):
+        """Stores a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
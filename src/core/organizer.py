@@ -1,29 +1,185 @@
+import contextlib
 import os
+import random
+import re
 import shutil
+import struct
 import threading
-import queue
+import time
 from src.core.file_utils import get_file_extension, get_file_creation_or_modification_date, resolve_duplicate_filepath, get_exif_date_taken
+from src.core.image_hash import compute_dhash, SimilarImageIndex
+from src.core.destination_index import DestinationIndex
+from src.core.pipeline import Pipeline
+from src.core.metadata_cache import MetadataCache
+from src.core.media_dates import read_media_creation_date
+from src.core.content_sniffer import sniff_extension
+from src.core.preview_summary import PreviewSummary, format_summary, format_size
+from src.core.dir_fds import SUPPORTS_DIR_FD, DirectoryFdCache, stat_file, make_directories, move_file, remove_directory, link_file, remove_file
+from src.core.tree_scanner import TreeScanner
+from src.core.bulk_io import BulkCopier, SUPPORTS_FADVISE, drop_cached_pages, read_page_cache_bytes
 # Import manager classes for type hinting/understanding, instances are passed
 from src.core.log_manager import LogManager
 from src.core.notification_manager import NotificationManager
 
+PROGRESS_INTERVAL = 0.1 # Minimum seconds between progress messages sent to the GUI
+SUMMARY_INTERVAL = 0.5 # Minimum seconds between live preview summary messages
+MEDIA_DATE_CATEGORIES = ("Videos", "Audio") # Categories whose containers carry a readable creation date
+RENAME_SUFFIX = re.compile(r"( \(\d+\))+$") # " (n)" added to a name by duplicate renaming
+
+
+class FileTask:
+    """
+    Carries one file through the organize pipeline.
+    Each stage fills in the fields it is responsible for.
+    """
+    __slots__ = ("source_path", "source_dir", "filename", "sequence", "collision_key", "error", "stat_result", "category", "file_date",
+                 "image_hash", "target_dir", "candidate_path", "final_path")
+
+    def __init__(self, source_dir, filename):
+        self.source_path = os.path.join(source_dir, filename)
+        self.source_dir = source_dir
+        self.filename = filename
+        self.sequence = None # Position in scan order; files with the same collision_key are planned in this order
+        self.collision_key = None
+        self.error = None # Exception raised before planning; reported by the plan stage in order
+        self.stat_result = None
+        self.category = "Others"
+        self.file_date = None
+        self.image_hash = None
+        self.target_dir = None
+        self.candidate_path = None
+        self.final_path = None
+
+
+class OrganizeRun:
+    """
+    Per-run state shared by the pipeline stages: the run parameters, the lookup
+    structures built for this run and the counters reported at the end.
+    """
+    def __init__(self, source_dir, destination_dir, duplicate_handling, sort_by_date_format, preview_mode):
+        self.source_dir = source_dir
+        self.destination_dir = destination_dir
+        self.duplicate_handling = duplicate_handling
+        self.sort_by_date_format = sort_by_date_format
+        self.preview_mode = preview_mode
+
+        self.extension_index = {} # extension -> category name
+        self.destination_index = DestinationIndex()
+        self.similar_images = None
+        self.sniff_content = False # Classify "Others" files by their magic number
+        self.created_dirs = set() # Target directories already ensured to exist in this run
+        self.dir_fds = None # DirectoryFdCache for directory-relative file operations; None = path-based calls
+        self.scanner = None # TreeScanner of the source tree, holds the inode/link counters
+        self.relink_hardlinks = False # Re-create further hard links at the destination instead of moving them
+        self.link_primaries = {} # (st_dev, st_ino) -> organized FileTask of a multiply linked file, relink mode only
+        self.deferred_links = [] # (FileTask, (st_dev, st_ino)) of further links, handled after the pipeline drains
+        self.bulk_copier = BulkCopier() # Cross-device copies; also decides whether read pages are dropped
+        self.page_cache_start = read_page_cache_bytes() # System-wide, so other processes contribute too
+        self.preview_actions = []
+        self.preview_detail_limit = 10000 # Max action lines kept for the preview list
+        self.preview_actions_omitted = 0 # Actions beyond the limit, counted but not listed
+        self.preview_summary = None
+        self.max_files_per_folder = 0 # 0 = unlimited; otherwise spill into hash-named bucket folders
+        self.shard_prefix_length = 2
+        # Empty-folder cleanup: source directory -> [parent directory, entries not yet moved away,
+        # whether this run moved or removed anything out of it].
+        # Filled by the scan (in walk order, parents first) only when cleanup is enabled.
+        self.directory_entries = None
+        self.dirs_removed = 0
+        self.cleanup_seconds = 0.0
+
+        self.scan_complete = False
+        self.destination_stat = None # Identity of the destination folder, pruned from the scan
+        self.files_submitted = 0 # Next scan sequence number
+        # Collision key -> scan sequences of the files with that key not yet planned, in scan order
+        self.plan_order = {}
+        self.plan_pending = {} # sequence -> FileTask that overtook an earlier file with the same key
+        # The scan waits while this many files are pending, so at most this plus what the stage queues hold
+        self.plan_pending_limit = 1000
+        self.files_found = 0
+        self.files_done = 0
+        self.files_moved = 0
+        self.files_skipped = 0
+        self.files_renamed = 0
+        self.files_relinked = 0
+        self.errors_count = 0
+        self.media_files_parsed = 0
+        self.media_bytes_read = 0
+        self.metadata_cache_hits = 0
+        self.files_sniffed = 0
+        self.files_reclassified = 0
+        self.sniff_seconds = 0.0
+        self.last_progress_time = 0.0
+        self.last_summary_time = 0.0
+        self.start_time = time.monotonic()
+        self.lock = threading.Lock()
+        self.plan_slots = threading.Condition(self.lock) # Notified whenever plan_pending shrinks
+
+    def get_statistics(self, stopped):
+        """Returns the final counters of the run as a plain dict."""
+        throughput = self.bulk_copier.get_throughput()
+        page_cache_now = read_page_cache_bytes()
+        page_cache_growth = None
+        if page_cache_now is not None and self.page_cache_start is not None:
+            page_cache_growth = page_cache_now - self.page_cache_start
+        with self.lock:
+            return {
+                "preview_mode": self.preview_mode,
+                "stopped": stopped,
+                "files_found": self.files_found,
+                "files_processed": self.files_done,
+                "files_moved": self.files_moved,
+                "files_renamed": self.files_renamed,
+                "files_skipped": self.files_skipped,
+                "errors": self.errors_count,
+                "hardlinks_found": self.scanner.hardlinks_found if self.scanner is not None else 0,
+                "hardlinks_relinked": self.files_relinked,
+                "symlinks_skipped": self.scanner.symlinks_skipped if self.scanner is not None else 0,
+                "directory_revisits_avoided": self.scanner.directory_revisits_avoided if self.scanner is not None else 0,
+                "files_sniffed": self.files_sniffed,
+                "files_reclassified": self.files_reclassified,
+                "empty_dirs_removed": self.dirs_removed,
+                "cleanup_seconds": round(self.cleanup_seconds, 3),
+                "dir_fds_opened": self.dir_fds.opened if self.dir_fds is not None else 0,
+                "dir_fd_reuses": self.dir_fds.reused if self.dir_fds is not None else 0,
+                "bulk_io_mode": self.bulk_copier.mode,
+                "bytes_copied": self.bulk_copier.bytes_copied,
+                "copy_throughput_mb_s": round(throughput, 1) if throughput is not None else None,
+                "page_cache_growth_bytes": page_cache_growth,
+                "elapsed_seconds": round(time.monotonic() - self.start_time, 3),
+            }
+
 
 class FileOrganizer:
     """
     Core logic for organizing files. Runs in a separate thread to keep the GUI responsive.
     Communicates progress and logs back to the GUI via a queue.
+
+    Files flow through concurrent stages connected by bounded queues:
+    scan (and classify) -> metadata -> plan -> execute. Moves start as soon as the
+    first file has been planned, while the scan is still walking the tree. The
+    metadata stage is left out when the run needs no metadata.
     """
     # Accept explicit instances of log_manager and notification_manager
-    def __init__(self, log_queue, settings, app_log_manager: LogManager, app_notification_manager: NotificationManager):
+    # The JobManager passes a shared metadata cache and I/O limiter so concurrent jobs share them
+    def __init__(self, log_queue, settings, app_log_manager: LogManager, app_notification_manager: NotificationManager,
+                 metadata_cache=None, io_limiter=None):
         self.log_queue = log_queue # Queue to send updates to GUI
         self.settings = settings
         self.app_log_manager = app_log_manager # Store the log manager instance
         self.app_notification_manager = app_notification_manager # Store the notification manager instance
         self._stop_event = threading.Event() # For stopping the process
+        self._pipeline = None # Pipeline of the run in progress, if any
+        # Kept across runs so a preview followed by the real run reads each file's metadata once
+        self._metadata_cache = metadata_cache if metadata_cache is not None else MetadataCache(self.settings.get("metadata_cache_size", 200000))
+        # Bounds simultaneous file reads/moves (e.g. a semaphore shared across jobs); unlimited by default
+        self._io_limiter = io_limiter if io_limiter is not None else contextlib.nullcontext()
+        self.last_statistics = None # Statistics of the last finished run; None if it could not start
 
-    def _update_progress(self, current, total, message=""):
-        """Sends progress updates to the GUI queue."""
-        self.log_queue.put({"type": "progress", "current": current, "total": total, "message": message})
+    def _update_progress(self, current, total, message="", done=False):
+        """Sends progress updates to the GUI queue. done marks the final update of a run."""
+        self.log_queue.put({"type": "progress", "current": current, "total": total, "message": message,
+                            "done": done, "queue_depths": self.get_queue_depths()})
 
     def _log_message(self, level, message):
         """Logs messages using the passed app_log_manager."""
@@ -40,6 +196,11 @@ class FileOrganizer:
         """Sets the stop event to terminate the organization process."""
         self._stop_event.set()
 
+    def get_queue_depths(self):
+        """Returns the number of files waiting in front of each pipeline stage (empty when idle)."""
+        pipeline = self._pipeline
+        return pipeline.get_queue_depths() if pipeline is not None else {}
+
     def organize_files_threaded(self, source_dir, destination_dir, duplicate_handling, sort_by_date_format, preview_mode=False):
         """
         Starts the file organization process in a new thread.
@@ -52,13 +213,14 @@ class FileOrganizer:
     def _organize_files(self, source_dir, destination_dir, duplicate_handling, sort_by_date_format, preview_mode):
         """
         The actual file organization logic. Runs in a separate thread.
-        This now includes recursive traversal using os.walk().
+        This thread performs the recursive scan and feeds the pipeline stages.
         """
+        self.last_statistics = None
         # Validate paths
         if not os.path.isdir(source_dir):
             self._log_message("error", f"Source directory does not exist: '{source_dir}'")
-            self.app_notification_manager.send_notification("Organizer Error", "Source directory not found!", timeout=3)
-            self._update_progress(0, 0, "Error: Source directory not found.")
+            self.app_notification_manager.send_notification("Organizer Error", "Source directory not found!", timeout=3, is_error=True)
+            self._update_progress(0, 0, "Error: Source directory not found.", done=True)
             return
         if not os.path.exists(destination_dir):
             try:
@@ -66,149 +228,625 @@ class FileOrganizer:
                 self._log_message("info", f"Created destination directory: '{destination_dir}'")
             except Exception as e:
                 self._log_message("error", f"Could not create destination directory '{destination_dir}': {e}")
-                self.app_notification_manager.send_notification("Organizer Error", "Could not create destination directory!", timeout=3)
-                self._update_progress(0, 0, "Error: Could not create destination directory.")
+                self.app_notification_manager.send_notification("Organizer Error", "Could not create destination directory!", timeout=3, is_error=True)
+                self._update_progress(0, 0, "Error: Could not create destination directory.", done=True)
                 return
         if not os.path.isdir(destination_dir):
             self._log_message("error", f"Destination path is not a directory: '{destination_dir}'")
-            self.app_notification_manager.send_notification("Organizer Error", "Destination path is not a directory!", timeout=3)
-            self._update_progress(0, 0, "Error: Destination path is invalid.")
+            self.app_notification_manager.send_notification("Organizer Error", "Destination path is not a directory!", timeout=3, is_error=True)
+            self._update_progress(0, 0, "Error: Destination path is invalid.", done=True)
             return
 
+        # Folder keys are built with os.path.dirname() during the scan; a trailing separator would not match them
+        source_dir = os.path.normpath(source_dir)
         self._log_message("info", f"{'PREVIEW MODE: ' if preview_mode else ''}Starting file organization from '{source_dir}' to '{destination_dir}'...")
 
-        all_files_to_process = []
+        run = OrganizeRun(source_dir, destination_dir, duplicate_handling, sort_by_date_format, preview_mode)
+        # Build the extension lookup once instead of scanning every category per file.
+        # setdefault keeps the first category listing an extension, as the old loop did.
+        for category, extensions in self.settings.get_categories().items():
+            for extension in extensions:
+                run.extension_index.setdefault(extension.lower(), category)
+        # Optional perceptual-hash grouping of near-duplicate images. Only shown in the preview,
+        # so real runs don't pay for decoding every photo.
+        if preview_mode and self.settings.get("detect_similar_images", False):
+            run.similar_images = SimilarImageIndex(self.settings.get("similar_image_threshold", 6))
+        run.sniff_content = self.settings.get("enable_content_sniffing", False)
+        sample_fraction = 1.0
+        if preview_mode:
+            sample_fraction = min(1.0, max(0.0, float(self.settings.get("preview_sample_fraction", 1.0))))
+            run.preview_summary = PreviewSummary(sample_fraction)
+        run.preview_detail_limit = self.settings.get("preview_detail_limit", 10000)
+        run.max_files_per_folder = self.settings.get("max_files_per_folder", 0)
+        run.shard_prefix_length = self.settings.get("shard_prefix_length", 2)
+        if run.max_files_per_folder > 0:
+            max_files, prefix_length = DestinationIndex.shard_settings(run.max_files_per_folder, run.shard_prefix_length)
+            if (max_files, prefix_length) != (run.max_files_per_folder, run.shard_prefix_length):
+                self._log_message("warning", f"max_files_per_folder {run.max_files_per_folder} leaves no room for "
+                                             f"{16 ** run.shard_prefix_length} bucket folders; using a cap of {max_files} "
+                                             f"with {prefix_length}-character buckets.")
+                run.max_files_per_folder, run.shard_prefix_length = max_files, prefix_length
+        if not preview_mode and self.settings.get("remove_empty_source_dirs", False):
+            run.directory_entries = {}
+        if SUPPORTS_DIR_FD and self.settings.get("use_dir_fds", True):
+            run.dir_fds = DirectoryFdCache(self.settings.get("max_open_dir_fds", 64))
+        run.bulk_copier = BulkCopier(self.settings.get("bulk_io_mode", "default"))
+        run.scanner = TreeScanner(source_dir, self.settings.get("hardlink_policy", "all"),
+                                  self.settings.get("symlink_policy", "move_link"), run.dir_fds)
+        run.relink_hardlinks = run.scanner.hardlink_policy == "relink"
+        if run.bulk_copier.mode == "drop_behind" and not SUPPORTS_FADVISE:
+            self._log_message("warning", "bulk_io_mode 'drop_behind' is not supported on this system; using normal caching.")
+
+        stage_workers = self.settings.get("pipeline_workers", {})
+        queue_size = self.settings.get("pipeline_queue_size", 1000)
+        run.plan_pending_limit = max(1, queue_size)
+        pipeline = Pipeline(self._stop_event, error_callback=lambda stage_name, task, e: self._record_file_error(run, task, e),
+                            batch_size=self.settings.get("pipeline_batch_size", 64))
+        # Without preview, date sorting, hard link relinking or sniffing there is no metadata to read: skip the stage
+        if preview_mode or sort_by_date_format != "None" or run.relink_hardlinks or run.sniff_content:
+            pipeline.add_stage("metadata", lambda task, emit: self._metadata_stage(run, task, emit), stage_workers.get("metadata", 4), queue_size)
+        # Planning must stay single-threaded: duplicate resolution depends on the order names are reserved
+        pipeline.add_stage("plan", lambda task, emit: self._plan_stage(run, task, emit), 1, queue_size)
+        if not preview_mode:
+            pipeline.add_stage("execute", lambda task, emit: self._execute_stage(run, task, emit), stage_workers.get("execute", 2), queue_size)
+        self._pipeline = pipeline
+        pipeline.start()
+
         excluded_folders = self.settings.get_excluded_folders() # Get excluded folders from settings
+        # Moves start while the scan is still running, so the scan must never list the folders it moves into
+        run.destination_stat = os.stat(destination_dir)
+        destination_name = os.path.normcase(os.path.basename(os.path.normpath(destination_dir)))
+        target_folder_names = set(self.settings.get_categories()) | {"Others"}
+        try:
+            # Recursively find all files, excluding specified folders, and feed them to the pipeline as found
+            for scanned in run.scanner.walk():
+                if self._stop_event.is_set():
+                    break
+                root = scanned.root
+                if run.directory_entries is not None:
+                    # Count every entry, including excluded and unreadable subfolders and skipped links, which are never removed.
+                    # Registered before the files are queued so moves can already decrement it.
+                    parent = os.path.dirname(root) if root != source_dir else None
+                    with run.lock:
+                        run.directory_entries[root] = [parent, scanned.entry_count, False]
+                # Exclude specified folders from being traversed
+                scanned.dirs[:] = [d for d in scanned.dirs if d not in excluded_folders]
+                if root == source_dir and os.path.samestat(os.stat(source_dir), run.destination_stat):
+                    # Organizing a folder in place: its category folders receive this run's files
+                    scanned.dirs[:] = [d for d in scanned.dirs if d not in target_folder_names]
+                scanned.dirs[:] = [d for d in scanned.dirs
+                                   if not self._is_destination(run, destination_name, os.path.join(root, d))]
+
+                if run.preview_summary is not None:
+                    # Sampling mode: plan the files of a random subset of directories only
+                    sampled = sample_fraction >= 1.0 or random.random() < sample_fraction
+                    run.preview_summary.add_directory(root, len(scanned.files), sampled)
+                    if not sampled:
+                        continue
+
+                for filename in scanned.files:
+                    task = FileTask(root, filename)
+                    self._classify(run, task)
+                    if not self._register_for_planning(run, task) or not pipeline.submit(task):
+                        break # Stopped while waiting for queue space
+                for filename, inode_key in scanned.linked_files:
+                    with run.lock:
+                        run.files_found += 1
+                    run.deferred_links.append((FileTask(root, filename), inode_key))
+        finally:
+            run.scan_complete = True
+            pipeline.close()
+            pipeline.join()
+            self._pipeline = None
+
+        try:
+            if run.deferred_links and not self._stop_event.is_set():
+                self._relink_deferred_links(run)
+            if run.directory_entries is not None and not self._stop_event.is_set():
+                self._remove_empty_source_dirs(run)
+        finally:
+            if run.dir_fds is not None:
+                run.dir_fds.close_all()
+        self._finish_run(run)
+
+    def _register_for_planning(self, run, task):
+        """
+        Counts a scanned file and gives it its place in the planning order. Waits while
+        plan_pending is full, so a file stuck in the metadata stage cannot make the others
+        pile up in memory. Returns False if the run was stopped while waiting.
+        """
+        task.collision_key = self._get_collision_key(task.filename)
+        with run.plan_slots:
+            while len(run.plan_pending) >= run.plan_pending_limit:
+                if self._stop_event.is_set():
+                    return False
+                run.plan_slots.wait(Pipeline.POLL_INTERVAL)
+            run.files_found += 1
+            task.sequence = run.files_submitted
+            run.files_submitted += 1
+            run.plan_order.setdefault(task.collision_key, []).append(task.sequence)
+        return True
 
-        # Recursively find all files, excluding specified folders
-        # Using a tuple for `dirs[:] = ...` because `dirs` is modified in-place
-        for root, dirs, files in os.walk(source_dir):
-            # Exclude specified folders from being traversed
-            dirs[:] = [d for d in dirs if d not in excluded_folders]
-
-            for filename in files:
-                # Construct full path to file
-                full_file_path = os.path.join(root, filename)
-                all_files_to_process.append(full_file_path)
-
-        total_files = len(all_files_to_process)
-        files_moved = 0
-        files_skipped = 0
-        files_renamed = 0
-        errors_count = 0
-        preview_actions = []
+    @staticmethod
+    def _get_collision_key(filename):
+        """
+        Files whose names can end up competing for the same destination name share a key:
+        the name without case (where the filesystem ignores it) and without " (n)" suffixes.
+        """
+        base, extension = os.path.splitext(os.path.normcase(filename))
+        return RENAME_SUFFIX.sub("", base) + extension
+
+    @staticmethod
+    def _is_destination(run, destination_name, directory):
+        """Returns True if directory is the run's destination folder (only stats folders with the same name)."""
+        if os.path.normcase(os.path.basename(directory)) != destination_name:
+            return False
+        try:
+            return os.path.samestat(os.stat(directory), run.destination_stat)
+        except OSError:
+            return False
+
+    def _relink_deferred_links(self, run):
+        """
+        Hard link policy "relink": every further link to a file organized in this run is
+        re-created as a hard link next to the organized copy and removed from the source,
+        so the data is moved (or copied across drives) and its metadata read only once.
+        Links whose file was not organized (skipped, failed, not sampled) stay in place.
+        """
+        for task, inode_key in run.deferred_links:
+            if self._stop_event.is_set():
+                break
+            primary = run.link_primaries.get(inode_key)
+            if primary is None:
+                with run.lock:
+                    run.files_skipped += 1
+                self._log_message("info", f"Left hard link '{task.source_path}' in place: the file it shares was not organized.")
+                self._file_done(run, task)
+                continue
+            # Same file, so same type and dates as the organized link
+            task.category, task.file_date, task.stat_result = primary.category, primary.file_date, primary.stat_result
+            self._choose_destination(run, task)
+            if task.final_path is None: # Duplicate name at the destination, "skip" handling
+                if run.preview_mode:
+                    self._add_preview_action(run, f"SKIP (Duplicate): '{task.filename}' (exists at '{task.candidate_path}')")
+                with run.lock:
+                    run.files_skipped += 1
+                self._file_done(run, task)
+                continue
+            if run.preview_mode:
+                self._add_preview_action(run, f"HARDLINK '{task.source_path}' as '{task.final_path}' (same file as '{primary.final_path}')")
+                self._file_done(run, task)
+                continue
+            try:
+                make_directories(run.dir_fds, task.target_dir)
+                try:
+                    link_file(run.dir_fds, primary.final_path, task.final_path)
+                    remove_file(run.dir_fds, task.source_path)
+                    relinked = True
+                except OSError as e:
+                    if os.path.lexists(task.final_path):
+                        raise # Linked but the source could not be removed: report, don't move again
+                    # Destination filesystem without hard links (e.g. FAT): move this link like any file
+                    self._log_message("warning", f"Could not hard link '{task.final_path}' ({e}); moving the file instead.")
+                    with self._io_limiter:
+                        move_file(run.dir_fds, task.source_path, task.final_path, run.bulk_copier.copy2)
+                    relinked = False
+            except Exception as e:
+                self._record_file_error(run, task, e)
+                continue
+            with run.lock:
+                run.files_moved += 1
+                run.files_relinked += relinked
+                if run.directory_entries is not None:
+                    self._count_moved_out(run, task.source_dir)
+                if task.final_path != task.candidate_path:
+                    run.files_renamed += 1
+            self._log_message("info", f"{'Relinked' if relinked else 'Moved'}: '{task.source_path}' to '{task.final_path}'")
+            self._file_done(run, task)
+
+    @staticmethod
+    def _count_moved_out(run, directory):
+        """Records that an entry of a scanned source folder was moved or removed. Caller holds run.lock (or is alone)."""
+        entry = run.directory_entries[directory]
+        entry[1] -= 1
+        entry[2] = True
+
+    def _remove_empty_source_dirs(self, run):
+        """
+        Removes source folders that this run emptied, deepest first, using the entry counts
+        kept during the scan: one rmdir per folder and no re-listing. Folders that were
+        already empty, the source root itself and excluded folders are never removed.
+        """
+        start_time = time.monotonic()
+        # The scan is top-down, so reversed scan order visits children before their parents
+        for directory in reversed(list(run.directory_entries)):
+            parent, remaining, emptied_by_run = run.directory_entries[directory]
+            if remaining != 0 or parent is None or not emptied_by_run:
+                continue
+            try:
+                remove_directory(run.dir_fds, directory)
+            except OSError as e:
+                # Something new appeared, or the folder is locked: leave it (and its parents) in place
+                self._log_message("warning", f"Could not remove empty folder '{directory}': {e}")
+                continue
+            run.dirs_removed += 1
+            self._count_moved_out(run, parent)
+        run.cleanup_seconds = time.monotonic() - start_time
+        self._log_message("info", f"Removed {run.dirs_removed} empty source folders in {run.cleanup_seconds:.2f}s.")
+
+    def _finish_run(self, run):
+        """Reports the outcome of a run once all stages have drained."""
+        total_files = run.files_found
         status_text = "" # To hold final status message
 
+        stopped = self._stop_event.is_set()
+        self.last_statistics = run.get_statistics(stopped)
+        if stopped:
+            status_text = "Organization process was stopped by user."
+            self._log_message("warning", status_text)
+            self.app_notification_manager.send_notification("Organizer Stopped", status_text, timeout=3)
+            self._send_run_finished(run, status_text)
+            self._update_progress(run.files_done, total_files, status_text, done=True) # Send final update
+            return
+
         if total_files == 0:
             status_text = "No files found to organize in the source directory or its subfolders."
             self._log_message("info", status_text)
             self.app_notification_manager.send_notification("File Organizer", status_text, timeout=3)
-            self._update_progress(0, 0, status_text) # Send final update
+            self._send_run_finished(run, status_text)
+            self._update_progress(0, 0, status_text, done=True) # Send final update
             return
 
-        for i, source_filepath in enumerate(all_files_to_process):
-            if self._stop_event.is_set():
-                status_text = "Organization process was stopped by user."
-                self._log_message("warning", status_text)
-                self.app_notification_manager.send_notification("Organizer Stopped", status_text, timeout=3)
-                self._update_progress(i, total_files, status_text) # Send final update
-                return
+        if run.dir_fds is not None:
+            self._log_message("info", f"Directory-relative file operations: {run.dir_fds.opened} folders opened, "
+                                      f"{run.dir_fds.reused} operations reused an open folder.")
 
-            # Extract just the filename for display/resolution
-            filename_only = os.path.basename(source_filepath)
-            self._update_progress(i, total_files, f"Processing: {filename_only}")
+        statistics = self.last_statistics
+        if statistics["bytes_copied"]:
+            self._log_message("info", f"Copied {format_size(statistics['bytes_copied'])} across filesystems "
+                                      f"at {statistics['copy_throughput_mb_s']} MB/s ({statistics['bulk_io_mode']} I/O mode).")
+        if statistics["page_cache_growth_bytes"] is not None:
+            growth = statistics["page_cache_growth_bytes"]
+            self._log_message("info", f"Page cache {'grew' if growth >= 0 else 'shrank'} by {format_size(abs(growth))} during the run.")
 
-            try:
-                file_ext = get_file_extension(filename_only)
-                category_name = "Others" # Default category for unmatched files
-
-                # Determine category based on extension
-                file_categories = self.settings.get_categories()
-                for category, extensions in file_categories.items():
-                    if file_ext in extensions:
-                        category_name = category
-                        break
-                # If no category matched, it remains "Others"
-
-                target_category_dir = os.path.join(destination_dir, category_name)
-
-                # Add date-based subfolders if enabled and not "Others"
-                if sort_by_date_format != "None" and category_name != "Others":
-                    file_date = None
-                    if category_name == "Images":
-                        # Try EXIF date first for images
-                        file_date = get_exif_date_taken(source_filepath)
-                    if not file_date:
-                        # Fallback to modification date (or creation date, using False for mod date)
-                        file_date = get_file_creation_or_modification_date(source_filepath, use_creation_date=False) # Use modification date as more reliable
-
-                    if file_date:
-                        date_folder = ""
-                        if sort_by_date_format == "Year":
-                            date_folder = str(file_date.year)
-                        elif sort_by_date_format == "Year-Month":
-                            date_folder = file_date.strftime('%Y_%m') # e.g., '2024_06'
-                        elif sort_by_date_format == "Year-Month-Day":
-                            date_folder = file_date.strftime('%Y_%m_%d') # e.g., '2024_06_25'
-
-                        if date_folder:
-                             target_category_dir = os.path.join(target_category_dir, date_folder)
-
-
-                # Ensure the target directory exists for the current file's destination
-                if not os.path.exists(target_category_dir):
-                    os.makedirs(target_category_dir)
-                    self._log_message("info", f"Created category directory: '{target_category_dir}'")
-
-                destination_filepath_candidate = os.path.join(target_category_dir, filename_only)
-
-                # Resolve duplicates for the final destination path
-                final_destination_filepath = resolve_duplicate_filepath(destination_filepath_candidate, duplicate_handling)
-
-                # Handle Preview Mode
-                if preview_mode:
-                    action_description = f"Move '{source_filepath}' to '{destination_filepath_candidate}'"
-                    if final_destination_filepath is None: # Skipped due to duplicate
-                        action_description = f"SKIP (Duplicate): '{os.path.basename(source_filepath)}' (exists at '{destination_filepath_candidate}')"
-                    elif final_destination_filepath != destination_filepath_candidate: # Renamed
-                        action_description = f"RENAME & Move: '{os.path.basename(source_filepath)}' to '{os.path.basename(final_destination_filepath)}'"
-                    preview_actions.append(action_description)
-                    continue # Skip actual file operation in preview mode
-
-                # Perform actual file movement
-                if final_destination_filepath is None: # This means it was skipped due to duplicate handling
-                    files_skipped += 1
-                    continue
-
-                if final_destination_filepath != destination_filepath_candidate:
-                    files_renamed += 1
-
-                shutil.move(source_filepath, final_destination_filepath)
-                files_moved += 1
-                self._log_message("info", f"Moved: '{source_filepath}' to '{final_destination_filepath}'")
-
-            except FileNotFoundError:
-                errors_count += 1
-                self._log_message("error", f"File not found during processing: '{source_filepath}'. It might have been moved or deleted externally. Skipping.")
-            except PermissionError:
-                errors_count += 1
-                self._log_message("error", f"Permission denied for file: '{source_filepath}'. Skipping.")
-            except shutil.Error as e: # Catch shutil specific errors (e.g., same file system, file in use, read-only)
-                errors_count += 1
-                self._log_message("error", f"Shutil error moving '{source_filepath}': {e}. Skipping.")
-            except Exception as e:
-                errors_count += 1
-                self._log_message("error", f"An unexpected error occurred processing '{source_filepath}': {e}")
+        if run.scanner.hardlinks_found or run.scanner.symlinks_skipped or run.scanner.directory_revisits_avoided:
+            self._log_message("info", f"Handled each physical file once: {run.scanner.hardlinks_found} extra hard links "
+                                      f"({run.files_relinked} relinked), {run.scanner.symlinks_skipped} symbolic links skipped, "
+                                      f"{run.scanner.directory_revisits_avoided} folder revisits (link loops) avoided.")
 
-        # Final actions after processing all files
-        if preview_mode:
-            self.log_queue.put({"type": "preview_results", "actions": preview_actions})
-            status_text = f"Preview complete. {len(preview_actions)} potential actions identified."
+        if run.files_sniffed:
+            files_per_second = run.files_sniffed / run.sniff_seconds if run.sniff_seconds > 0 else 0
+            self._log_message("info", f"Sniffed the content of {run.files_sniffed} unrecognised files ({files_per_second:.0f} files/s per worker), "
+                                      f"{run.files_reclassified} moved out of 'Others'.")
+
+        if run.media_files_parsed:
+            self._log_message("info", f"Read embedded dates from {run.media_files_parsed} video/audio files "
+                                      f"({run.media_bytes_read // run.media_files_parsed} bytes per file on average, "
+                                      f"{run.metadata_cache_hits} cached lookups).")
+
+        similar_groups = run.similar_images.get_groups() if run.similar_images is not None else []
+        if similar_groups:
+            self._log_message("info", f"Found {len(similar_groups)} groups of near-duplicate images.")
+
+        if run.preview_mode:
+            preview_actions = run.preview_actions
+            action_count = len(preview_actions) + run.preview_actions_omitted # Group listings below are annotations, not actions
+            if run.preview_actions_omitted:
+                preview_actions.append(f"... {run.preview_actions_omitted} more actions not listed (see the summary for totals).")
+            # Group listings get their own preview_detail_limit budget so huge photo libraries stay bounded
+            group_lines = 0
+            for group_number, (representative, members) in enumerate(similar_groups, start=1):
+                if group_lines + len(members) + 1 > run.preview_detail_limit:
+                    preview_actions.append(f"... {len(similar_groups) - group_number + 1} more near-duplicate groups not listed.")
+                    break
+                preview_actions.append(f"NEAR-DUPLICATE GROUP {group_number} ({len(members) + 1} images): '{representative}'")
+                for member_path, distance in members:
+                    preview_actions.append(f"    ~ '{member_path}' (distance {distance})")
+                group_lines += len(members) + 1
+            summary = run.preview_summary.snapshot()
+            self._log_message("info", "Preview summary:\n" + format_summary(summary))
+            self.log_queue.put({"type": "preview_results", "actions": preview_actions, "summary": summary})
+            status_text = f"Preview complete. {action_count} potential actions identified."
             self._log_message("info", status_text)
             self.app_notification_manager.send_notification("Preview Complete", status_text, timeout=3)
-            self._update_progress(total_files, total_files, status_text) # Send final update
+            self._send_run_finished(run, status_text)
+            self._update_progress(total_files, total_files, status_text, done=True) # Send final update
         else:
-            status_text = f"Organization complete! Moved {files_moved} files, renamed {files_renamed} files, skipped {files_skipped} duplicates, encountered {errors_count} errors."
+            status_text = f"Organization complete! Moved {run.files_moved} files, renamed {run.files_renamed} files, skipped {run.files_skipped} duplicates, encountered {run.errors_count} errors."
+            if run.directory_entries is not None:
+                status_text += f" Removed {run.dirs_removed} empty folders ({run.cleanup_seconds:.2f}s)."
             self._log_message("info", status_text)
             self.app_notification_manager.send_notification("Organization Complete", status_text, timeout=5)
-            self._update_progress(total_files, total_files, status_text) # Send final update
\ No newline at end of file
+            self._send_run_finished(run, status_text)
+            self._update_progress(total_files, total_files, status_text, done=True) # Send final update
+
+    def _send_run_finished(self, run, status_text):
+        """Hands the run summary to the notification manager's run hooks (webhook, post-run command)."""
+        self.app_notification_manager.send_run_finished({"event": "run_finished", "source_dir": run.source_dir,
+                                                         "destination_dir": run.destination_dir, "status": status_text,
+                                                         "statistics": self.last_statistics})
+
+    def _file_done(self, run, task):
+        """Marks a file as finished (moved, previewed, skipped or failed) and reports progress."""
+        now = time.monotonic()
+        with run.lock:
+            run.files_done += 1
+            done, found = run.files_done, run.files_found
+            # Throttle GUI updates; a message per file floods the queue on large trees
+            send_update = now - run.last_progress_time >= PROGRESS_INTERVAL
+            if send_update:
+                run.last_progress_time = now
+        if send_update:
+            self._update_progress(done, found, f"Processing: {task.filename}{'' if run.scan_complete else ' (still scanning)'}")
+
+    def _record_file_error(self, run, task, error):
+        """Logs a per-file error and counts it, without stopping the run."""
+        source_filepath = task.source_path
+        if isinstance(error, FileNotFoundError):
+            self._log_message("error", f"File not found during processing: '{source_filepath}'. It might have been moved or deleted externally. Skipping.")
+        elif isinstance(error, PermissionError):
+            self._log_message("error", f"Permission denied for file: '{source_filepath}'. Skipping.")
+        elif isinstance(error, shutil.Error): # Catch shutil specific errors (e.g., same file system, file in use, read-only)
+            self._log_message("error", f"Shutil error moving '{source_filepath}': {error}. Skipping.")
+        else:
+            self._log_message("error", f"An unexpected error occurred processing '{source_filepath}': {error}")
+        with run.lock:
+            run.errors_count += 1
+        self._file_done(run, task)
+
+    @staticmethod
+    def _classify(run, task):
+        """
+        Determines the category of a file from its extension. Done by the scan thread: a dict
+        lookup costs less than handing the file to a stage of its own. Failures travel with the
+        task, as in the metadata stage.
+        """
+        # If no category matches, it remains "Others"
+        try:
+            task.category = run.extension_index.get(get_file_extension(task.filename), "Others")
+        except Exception as e:
+            task.error = e
+
+    def _metadata_stage(self, run, task, emit):
+        """
+        Reads per-file metadata. Failures travel with the task, so the plan stage, which
+        plans same-named files in scan order, never waits for a file that will not come.
+        """
+        try:
+            self._read_metadata(run, task)
+        except Exception as e:
+            task.error = e
+        emit(task)
+
+    def _read_metadata(self, run, task):
+        """Reads per-file metadata (content type, dates, image hashes). Runs on several workers since this is the slow part."""
+        if (run.preview_mode or run.sort_by_date_format != "None" or run.relink_hardlinks
+                or (run.sniff_content and task.category == "Others")):
+            # One stat per file, shared by the preview summary (size) and the metadata cache keys
+            task.stat_result = stat_file(run.dir_fds, task.source_path)
+
+        read_contents = False
+        if run.sniff_content and task.category == "Others":
+            # The extension gave nothing away: fall back to the file's magic number
+            read_contents = self._sniff_category(run, task)
+        if run.similar_images is not None and task.category == "Images":
+            with self._io_limiter:
+                task.image_hash = compute_dhash(task.source_path)
+            read_contents = True
+
+        # Date-based subfolders are only used if enabled and not "Others"
+        if run.sort_by_date_format != "None" and task.category != "Others":
+            # Try the date recorded inside the file first (EXIF, container or tag metadata)
+            task.file_date, parsed = self._get_embedded_date(run, task)
+            read_contents = read_contents or parsed
+            if not task.file_date:
+                # Fallback to modification date (or creation date, using False for mod date)
+                task.file_date = get_file_creation_or_modification_date(task.source_path, use_creation_date=False) # Use modification date as more reliable
+        if read_contents and run.bulk_copier.drop_behind:
+            drop_cached_pages(task.source_path) # Don't let metadata reads of a huge library evict other programs' files
+
+    def _sniff_category(self, run, task):
+        """
+        Re-classifies an "Others" file from its first bytes. The sniffed extension is looked up
+        in the extension index, so the file goes where a correctly named file would.
+        Returns True if the file had to be read (i.e. the content type was not cached).
+        """
+        cache_key = MetadataCache.make_key(task.stat_result, "content_type")
+        found, extension = self._metadata_cache.lookup(cache_key)
+        if found:
+            with run.lock:
+                run.metadata_cache_hits += 1
+        else:
+            start_time = time.monotonic()
+            with self._io_limiter:
+                extension = sniff_extension(task.source_path)
+            self._metadata_cache.put(cache_key, extension)
+            with run.lock:
+                run.files_sniffed += 1
+                run.sniff_seconds += time.monotonic() - start_time
+        if extension is not None:
+            task.category = run.extension_index.get(extension, "Others")
+            if task.category != "Others":
+                with run.lock:
+                    run.files_reclassified += 1
+        return not found
+
+    def _get_embedded_date(self, run, task):
+        """
+        Returns (date, parsed): the capture/creation date stored inside an image, video or audio
+        file (or None), and whether the file had to be read to get it.
+        Results are cached by (device, inode, size, mtime) so unchanged files are parsed once.
+        """
+        if task.category != "Images" and task.category not in MEDIA_DATE_CATEGORIES:
+            return None, False
+        cache_key = MetadataCache.make_key(task.stat_result, "date")
+        found, file_date = self._metadata_cache.lookup(cache_key)
+        if found:
+            with run.lock:
+                run.metadata_cache_hits += 1
+            return file_date, False
+
+        if task.category == "Images":
+            with self._io_limiter:
+                file_date = get_exif_date_taken(task.source_path)
+        else:
+            try:
+                with self._io_limiter:
+                    file_date, bytes_read = read_media_creation_date(task.source_path)
+            except (OSError, struct.error, ValueError, OverflowError) as e:
+                # Truncated or malformed headers: fall back to the filesystem date like any undated file
+                self._log_message("warning", f"Could not read media date from '{task.source_path}': {e}")
+                file_date, bytes_read = None, 0
+            with run.lock:
+                run.media_files_parsed += 1
+                run.media_bytes_read += bytes_read
+        self._metadata_cache.put(cache_key, file_date)
+        return file_date, True
+
+    def _plan_stage(self, run, task, emit):
+        """
+        Plans files as they arrive, except that files with the same collision key are planned
+        in scan order: one that overtakes an earlier namesake in the metadata stage waits in
+        plan_pending, so which of them keeps its name is the same on every run, while a slow
+        file never holds up files it cannot collide with. Single-threaded.
+        """
+        with run.lock:
+            if run.plan_order[task.collision_key][0] != task.sequence:
+                run.plan_pending[task.sequence] = task
+                return
+        while task is not None:
+            try:
+                if task.error is not None:
+                    raise task.error
+                self._plan_file(run, task, emit)
+            except Exception as e:
+                self._record_file_error(run, task, e)
+            with run.plan_slots:
+                order = run.plan_order[task.collision_key]
+                order.pop(0)
+                if order:
+                    task = run.plan_pending.pop(order[0], None) # None: not through the metadata stage yet
+                    if task is not None:
+                        run.plan_slots.notify_all()
+                else:
+                    del run.plan_order[task.collision_key]
+                    task = None
+
+    def _plan_file(self, run, task, emit):
+        """Chooses the final destination path of a file and resolves duplicates."""
+        if task.image_hash is not None:
+            run.similar_images.add(task.source_path, task.image_hash)
+
+        self._choose_destination(run, task)
+
+        # Handle Preview Mode
+        if run.preview_mode:
+            action_description = f"Move '{task.source_path}' to '{task.candidate_path}'"
+            if task.final_path is None: # Skipped due to duplicate
+                action_description = f"SKIP (Duplicate): '{task.filename}' (exists at '{task.candidate_path}')"
+            elif task.final_path != task.candidate_path: # Renamed
+                action_description = f"RENAME & Move: '{task.filename}' to '{os.path.basename(task.final_path)}'"
+            self._add_preview_action(run, action_description)
+            if task.final_path is not None:
+                self._register_link_primary(run, task)
+            run.preview_summary.add_file(task.source_dir, task.category, task.stat_result.st_size,
+                                         os.path.relpath(task.target_dir, run.destination_dir),
+                                         renamed=task.final_path is not None and task.final_path != task.candidate_path,
+                                         skipped=task.final_path is None)
+            self._send_preview_summary(run)
+            self._file_done(run, task)
+            return # Skip actual file operation in preview mode
+
+        if task.final_path is None: # This means it was skipped due to duplicate handling
+            with run.lock:
+                run.files_skipped += 1
+            self._file_done(run, task)
+            return
+        emit(task)
+
+    def _choose_destination(self, run, task):
+        """Sets the target folder and final path of a file; final_path is None if it is skipped as a duplicate."""
+        task.target_dir = os.path.join(run.destination_dir, task.category)
+        date_folder = self._get_date_folder(task.file_date, run.sort_by_date_format)
+        if date_folder:
+            task.target_dir = os.path.join(task.target_dir, date_folder)
+
+        place_filepath = None
+        if run.max_files_per_folder > 0:
+            place_filepath = lambda path: self._get_sharded_filepath(run, path)
+        task.candidate_path = os.path.join(task.target_dir, task.filename)
+        # Resolve duplicates against the destination index, which also knows about
+        # files planned earlier in this run that have not been moved yet
+        task.final_path = resolve_duplicate_filepath(task.candidate_path, run.duplicate_handling, run.destination_index, place_filepath)
+        if place_filepath is not None:
+            task.candidate_path = place_filepath(task.candidate_path)
+            if task.final_path is not None:
+                task.target_dir = os.path.dirname(task.final_path)
+
+    @staticmethod
+    def _add_preview_action(run, action_description):
+        """Adds a line to the preview list, up to preview_detail_limit lines."""
+        if len(run.preview_actions) < run.preview_detail_limit:
+            run.preview_actions.append(action_description)
+        else:
+            run.preview_actions_omitted += 1 # Keep memory bounded on huge trees; totals live in the summary
+
+    @staticmethod
+    def _register_link_primary(run, task):
+        """Remembers an organized file that has further hard links, for _relink_deferred_links."""
+        if run.relink_hardlinks and task.stat_result.st_nlink > 1:
+            with run.lock:
+                run.link_primaries.setdefault((task.stat_result.st_dev, task.stat_result.st_ino), task)
+
+    @staticmethod
+    def _get_sharded_filepath(run, filepath):
+        """
+        Maps a path in a category folder to its bucket subfolder when folders are capped.
+        Folder sizes come from the destination index, so full folders are never re-listed.
+        """
+        directory, filename = os.path.split(filepath)
+        shard_directory = run.destination_index.get_shard_directory(directory, filename, run.max_files_per_folder, run.shard_prefix_length)
+        return os.path.join(shard_directory, filename)
+
+    def _send_preview_summary(self, run):
+        """Sends the live preview aggregates to the GUI, at most every SUMMARY_INTERVAL seconds."""
+        now = time.monotonic()
+        if now - run.last_summary_time < SUMMARY_INTERVAL:
+            return
+        run.last_summary_time = now
+        self.log_queue.put({"type": "preview_summary", "summary": run.preview_summary.snapshot()})
+
+    def _execute_stage(self, run, task, emit):
+        """Creates the target directory if needed and moves the file."""
+        # Ensure the target directory exists for the current file's destination.
+        # Done under the run lock so two workers never race on the same new directory.
+        with run.lock:
+            if task.target_dir not in run.created_dirs:
+                if make_directories(run.dir_fds, task.target_dir):
+                    self._log_message("info", f"Created category directory: '{task.target_dir}'")
+                run.created_dirs.add(task.target_dir)
+
+        with self._io_limiter:
+            move_file(run.dir_fds, task.source_path, task.final_path, run.bulk_copier.copy2)
+        self._register_link_primary(run, task)
+        with run.lock:
+            run.files_moved += 1
+            if run.directory_entries is not None:
+                self._count_moved_out(run, task.source_dir)
+            if task.final_path != task.candidate_path:
+                run.files_renamed += 1
+        self._log_message("info", f"Moved: '{task.source_path}' to '{task.final_path}'")
+        self._file_done(run, task)
+
+    @staticmethod
+    def _get_date_folder(file_date, sort_by_date_format):
+        """Returns the date subfolder name for a file date, or "" if date sorting is off."""
+        if not file_date:
+            return ""
+        if sort_by_date_format == "Year":
+            return str(file_date.year)
+        elif sort_by_date_format == "Year-Month":
+            return file_date.strftime('%Y_%m') # e.g., '2024_06'
+        elif sort_by_date_format == "Year-Month-Day":
+            return file_date.strftime('%Y_%m_%d') # e.g., '2024_06_25'
+        return ""
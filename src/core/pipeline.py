@@ -0,0 +1,147 @@
+import queue
+import threading
+
+_END_OF_STREAM = object() # Sentinel passed downstream once a stage has drained
+
+
+class PipelineStage:
+    """
+    One stage of a Pipeline: a pool of worker threads that pull batches of items from a
+    bounded input queue, run a handler on each item and pass results on to the next stage.
+    """
+    def __init__(self, name, handler, workers=1, queue_size=1000, batch_size=1):
+        self.name = name
+        self.handler = handler # Called as handler(item, emit)
+        self.workers = max(1, int(workers))
+        # The queue holds batches; size it so that about queue_size items fit
+        self.input_queue = queue.Queue(maxsize=max(1, -(-int(queue_size) // batch_size)))
+        self.next_stage = None
+        self._threads = []
+        self._active_workers = 0
+        self._lock = threading.Lock()
+
+
+class Pipeline:
+    """
+    Connects stages with bounded queues so that each stage starts working as soon as
+    the previous one produces its first item. A full queue blocks the producer
+    (backpressure), and setting the stop event makes every worker exit promptly.
+
+    Items travel between stages in batches of up to batch_size, so the queue hand-off
+    is paid per batch rather than per item. A batch is handed on early whenever the next
+    stage has nothing queued, so an idle stage never waits for a batch to fill.
+    """
+    POLL_INTERVAL = 0.1 # Seconds between stop-event checks while blocked on a queue
+
+    def __init__(self, stop_event, error_callback=None, batch_size=1):
+        self._stop_event = stop_event
+        self._error_callback = error_callback # Called as error_callback(stage_name, item, exception)
+        self.batch_size = max(1, int(batch_size))
+        self._stages = []
+        self._submitted = [] # Items submitted but not yet handed to the first stage
+
+    def add_stage(self, name, handler, workers=1, queue_size=1000):
+        """Appends a stage to the pipeline and returns it."""
+        stage = PipelineStage(name, handler, workers, queue_size, self.batch_size)
+        if self._stages:
+            self._stages[-1].next_stage = stage
+        self._stages.append(stage)
+        return stage
+
+    def start(self):
+        """Starts the worker threads of every stage."""
+        for stage in self._stages:
+            stage._active_workers = stage.workers
+            for worker_number in range(stage.workers):
+                thread = threading.Thread(target=self._run_worker, args=(stage,), name=f"{stage.name}-{worker_number}")
+                thread.daemon = True
+                stage._threads.append(thread)
+                thread.start()
+
+    def submit(self, item):
+        """
+        Feeds an item into the first stage, blocking while it is full. Call from one thread only.
+        Returns False if the pipeline was stopped before the item could be queued.
+        """
+        return self._add_to_batch(self._stages[0].input_queue, self._submitted, item)
+
+    def close(self):
+        """Signals that no more items will be submitted."""
+        first_queue = self._stages[0].input_queue
+        if self._submitted:
+            self._flush(first_queue, self._submitted)
+        self._put(first_queue, _END_OF_STREAM)
+
+    def join(self):
+        """Waits until every stage has drained (or stopped)."""
+        for stage in self._stages:
+            for thread in stage._threads:
+                thread.join()
+
+    def get_queue_depths(self):
+        """Returns the number of items waiting in front of each stage."""
+        return {stage.name: self._count_queued_items(stage.input_queue) for stage in self._stages}
+
+    @staticmethod
+    def _count_queued_items(batch_queue):
+        with batch_queue.mutex:
+            return sum(len(batch) for batch in batch_queue.queue if batch is not _END_OF_STREAM)
+
+    def _add_to_batch(self, target_queue, batch, item):
+        """Adds an item to a batch bound for target_queue, handing the batch on if it is full or the queue is empty."""
+        batch.append(item)
+        if len(batch) >= self.batch_size or target_queue.empty():
+            return self._flush(target_queue, batch)
+        return True
+
+    def _flush(self, target_queue, batch):
+        """Puts the items collected in batch on the queue as one batch and empties it."""
+        items = batch[:]
+        batch.clear()
+        return self._put(target_queue, items)
+
+    def _put(self, target_queue, item):
+        """Puts an item on a queue, giving up if the stop event is set while waiting."""
+        while not self._stop_event.is_set():
+            try:
+                target_queue.put(item, timeout=self.POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run_worker(self, stage):
+        """Worker loop for one thread of a stage."""
+        output = [] # Items emitted by this worker, not yet handed to the next stage
+        if stage.next_stage is not None:
+            next_queue = stage.next_stage.input_queue
+            emit = lambda item: self._add_to_batch(next_queue, output, item)
+        else:
+            emit = lambda item: True # Last stage: nothing downstream
+
+        while not self._stop_event.is_set():
+            try:
+                batch = stage.input_queue.get(timeout=self.POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if batch is _END_OF_STREAM:
+                # Put the sentinel back so sibling workers of this stage also see it
+                self._put(stage.input_queue, batch)
+                break
+            for item in batch:
+                if self._stop_event.is_set():
+                    break
+                try:
+                    stage.handler(item, emit)
+                except Exception as e:
+                    if self._error_callback:
+                        self._error_callback(stage.name, item, e)
+            if output:
+                self._flush(next_queue, output)
+
+        # The last worker of a stage to finish tells the next stage that input has ended
+        with stage._lock:
+            stage._active_workers -= 1
+            is_last_worker = stage._active_workers == 0
+        if is_last_worker and stage.next_stage is not None:
+            self._put(stage.next_stage.input_queue, _END_OF_STREAM)
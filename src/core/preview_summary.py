@@ -0,0 +1,137 @@
+import math
+import threading
+from collections import Counter
+
+Z_95 = 1.96 # z-score for a 95% confidence interval
+LARGEST_FOLDERS_SHOWN = 5
+
+
+def format_size(num_bytes):
+    """Formats a byte count for display, e.g. 1536 -> '1.5 KB'."""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(size) < 1024 or unit == "TB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class PreviewSummary:
+    """
+    Incremental aggregates for a preview run: per-category file counts and bytes,
+    renames, skips and the busiest destination folders. Updated as each file is
+    planned, so a snapshot is available at any time while the scan continues.
+
+    In sampling mode only a random subset of source directories is planned. The scan
+    still lists every directory, so the number of files is known exactly; bytes and
+    renames are extrapolated from the sampled directories (ratio to their file counts),
+    with a 95% confidence interval.
+    """
+    def __init__(self, sample_fraction=1.0):
+        self.sample_fraction = sample_fraction
+        self.sampling = sample_fraction < 1.0
+        self._lock = threading.Lock()
+        self._category_files = Counter()
+        self._category_bytes = Counter()
+        self._folder_files = Counter()
+        self._renames = 0
+        self._skips = 0
+        self._directories_seen = 0
+        self._files_found = 0 # In every directory scanned, sampled or not
+        self._sampled_directories = {} # source directory -> [files, bytes, renames], sampling mode only
+
+    def add_directory(self, directory, file_count, sampled):
+        """Records a scanned source directory, its number of files and whether they are included in the sample."""
+        with self._lock:
+            self._directories_seen += 1
+            self._files_found += file_count
+            if self.sampling and sampled:
+                self._sampled_directories[directory] = [file_count, 0, 0]
+
+    def add_file(self, source_directory, category, size, target_dir, renamed, skipped):
+        """Records one planned file."""
+        with self._lock:
+            if skipped:
+                self._skips += 1
+                return
+            if renamed:
+                self._renames += 1
+            self._category_files[category] += 1
+            self._category_bytes[category] += size
+            self._folder_files[target_dir] += 1
+            directory_totals = self._sampled_directories.get(source_directory)
+            if directory_totals is not None:
+                directory_totals[1] += size
+                directory_totals[2] += renamed
+
+    def snapshot(self):
+        """Returns the current aggregates as a plain dict (safe to pass through the GUI queue)."""
+        with self._lock:
+            summary = {
+                "files": sum(self._category_files.values()),
+                "bytes": sum(self._category_bytes.values()),
+                "categories": {category: {"files": count, "bytes": self._category_bytes[category]}
+                               for category, count in self._category_files.most_common()},
+                "renames": self._renames,
+                "skips": self._skips,
+                "largest_folders": self._folder_files.most_common(LARGEST_FOLDERS_SHOWN),
+                "sampled": self.sampling,
+                "directories_seen": self._directories_seen,
+            }
+            if self.sampling:
+                sampled_totals = list(self._sampled_directories.values())
+                file_counts = [totals[0] for totals in sampled_totals]
+                summary["directories_sampled"] = len(sampled_totals)
+                summary["files_found"] = self._files_found
+                summary["estimate"] = {
+                    "bytes": self._estimate_total(file_counts, [totals[1] for totals in sampled_totals]),
+                    "renames": self._estimate_total(file_counts, [totals[2] for totals in sampled_totals]),
+                }
+            return summary
+
+    def _estimate_total(self, file_counts, sample_values):
+        """
+        Estimates a population total from per-directory sample values as their ratio to the
+        sampled file counts times the exact number of files found (simple random sampling
+        of directories, with finite population correction).
+        Returns (estimate, low, high), or None before any sampled file was found.
+        """
+        sample_count = len(sample_values)
+        sampled_files = sum(file_counts)
+        if sampled_files == 0:
+            return None
+        ratio = sum(sample_values) / sampled_files
+        estimate = ratio * self._files_found
+        if sample_count < 2:
+            return (round(estimate), None, None) # No variance estimate yet
+        population = self._directories_seen
+        variance = sum((value - ratio * files) ** 2 for files, value in zip(file_counts, sample_values)) / (sample_count - 1)
+        correction = max(0.0, 1 - sample_count / population)
+        margin = Z_95 * population * math.sqrt(variance / sample_count * correction)
+        return (round(estimate), max(0, round(estimate - margin)), round(estimate + margin))
+
+
+def format_summary(summary):
+    """Formats a PreviewSummary snapshot as a few lines of text for the GUI and logs."""
+    lines = []
+    if summary.get("sampled"):
+        lines.append(f"Sampled {summary.get('directories_sampled', 0)} of {summary['directories_seen']} folders scanned, "
+                     f"{summary.get('files_found', 0):,} files found.")
+        estimate = summary.get("estimate", {})
+        for key, label, formatter in (("bytes", "data", format_size), ("renames", "renames", "{:,}".format)):
+            value = estimate.get(key)
+            if value is None:
+                continue
+            total, low, high = value
+            bounds = f" (95% CI {formatter(low)} - {formatter(high)})" if low is not None else ""
+            lines.append(f"Estimated {label}: {formatter(total)}{bounds}")
+        lines.append("Sample totals:")
+    lines.append(f"{summary['files']:,} files to move ({format_size(summary['bytes'])}), "
+                 f"{summary['renames']:,} renames, {summary['skips']:,} skipped duplicates.")
+    categories = summary.get("categories", {})
+    if categories:
+        lines.append("  ".join(f"{category}: {totals['files']:,} ({format_size(totals['bytes'])})"
+                               for category, totals in categories.items()))
+    largest_folders = summary.get("largest_folders", [])
+    if largest_folders:
+        lines.append("Largest destination folders: " + ", ".join(f"{folder} ({count:,})" for folder, count in largest_folders))
+    return "\n".join(lines)
@@ -0,0 +1,130 @@
+import os
+
+HARDLINK_POLICIES = ("all", "skip", "relink")
+SYMLINK_POLICIES = ("move_link", "skip", "follow")
+
+
+class ScannedDirectory:
+    """One directory visited by TreeScanner.walk(). Prune dirs in place to skip subfolders."""
+    __slots__ = ("root", "dirs", "files", "linked_files", "entry_count")
+
+    def __init__(self, root):
+        self.root = root
+        self.dirs = [] # Subfolder names that will be entered next
+        self.files = [] # File names to organize
+        self.linked_files = [] # (name, (st_dev, st_ino)) of further hard links to a file already seen
+        self.entry_count = 0 # Everything listed in the folder, including skipped links
+
+
+class TreeScanner:
+    """
+    Top-down walk of the source tree built on os.scandir(), tracking physical files and
+    folders by (st_dev, st_ino) so each one is handled once.
+
+    Inode numbers come from the DirEntry (d_ino on POSIX), and the device from one stat of
+    the folder being listed, so tracking costs no extra system call per file. Only
+    symbolic links need a stat, to find out what they point to.
+
+    hardlink_policy: "all" organizes every link separately (the original behaviour),
+    "skip" organizes the first link found and leaves the others in place, "relink"
+    reports the others in linked_files so they can be re-created as hard links to the
+    moved file instead of being moved (or copied) again.
+    symlink_policy: "move_link" moves links to files as links and does not enter linked
+    folders (the original behaviour), "skip" leaves all links alone, "follow" enters
+    linked folders, visiting every physical folder once so link loops end, and skips
+    links to files the scan has already picked up (other links are moved as links).
+    """
+    def __init__(self, top, hardlink_policy="all", symlink_policy="move_link", fd_cache=None):
+        self.top = top
+        self.hardlink_policy = hardlink_policy if hardlink_policy in HARDLINK_POLICIES else "all"
+        self.symlink_policy = symlink_policy if symlink_policy in SYMLINK_POLICIES else "move_link"
+        self.fd_cache = fd_cache # DirectoryFdCache: list folders relative to their parent's descriptor
+        self._track_files = self.hardlink_policy != "all" or self.symlink_policy == "follow"
+        self._seen_files = {} # st_dev -> set of inode numbers; one set per device keeps keys to a single int
+        self._visited_dirs = set() # (st_dev, st_ino) of folders entered, "follow" mode only
+        self.hardlinks_found = 0
+        self.symlinks_skipped = 0
+        self.directory_revisits_avoided = 0
+
+    def walk(self):
+        """Yields a ScannedDirectory per folder, parents before their children."""
+        stack = [self.top]
+        while stack:
+            root = stack.pop()
+            try:
+                scanned = self._scan_directory(root)
+            except OSError:
+                continue # Unreadable or vanished folder; os.walk skips these silently too
+            if scanned is None:
+                continue
+            yield scanned
+            # Push in reverse so subfolders are visited in listing order
+            stack.extend(os.path.join(root, name) for name in reversed(scanned.dirs))
+
+    def _scan_directory(self, root):
+        """Lists one folder. Returns None if it was already visited through another link."""
+        if self.fd_cache is None:
+            return self._read_entries(root, root)
+        with self.fd_cache.open_directory(root) as dir_fd:
+            return self._read_entries(root, dir_fd)
+
+    def _read_entries(self, root, listable):
+        if self._track_files:
+            directory_stat = os.stat(listable)
+            if self.symlink_policy == "follow":
+                directory_key = (directory_stat.st_dev, directory_stat.st_ino)
+                if directory_key in self._visited_dirs:
+                    self.directory_revisits_avoided += 1
+                    return None
+                self._visited_dirs.add(directory_key)
+            seen_inodes = self._seen_files.setdefault(directory_stat.st_dev, set())
+            device = directory_stat.st_dev
+
+        scanned = ScannedDirectory(root)
+        with os.scandir(listable) as entries:
+            for entry in entries:
+                scanned.entry_count += 1
+                try:
+                    if entry.is_symlink():
+                        self._add_symlink(scanned, entry)
+                        continue
+                    if entry.is_dir():
+                        scanned.dirs.append(entry.name)
+                        continue
+                    if not self._track_files:
+                        scanned.files.append(entry.name)
+                        continue
+                    inode = entry.inode()
+                except OSError:
+                    continue # Entry disappeared while listing
+                if inode in seen_inodes and self.hardlink_policy != "all":
+                    self.hardlinks_found += 1
+                    if self.hardlink_policy == "relink":
+                        scanned.linked_files.append((entry.name, (device, inode)))
+                    continue
+                seen_inodes.add(inode)
+                scanned.files.append(entry.name)
+        return scanned
+
+    def _add_symlink(self, scanned, entry):
+        """Applies the symlink policy to one link found while listing."""
+        if self.symlink_policy == "skip":
+            self.symlinks_skipped += 1
+            return
+        if self.symlink_policy == "move_link":
+            if not entry.is_dir(): # Links to folders are neither entered nor moved, as with os.walk
+                scanned.files.append(entry.name)
+            return
+        try:
+            target_stat = entry.stat() # Follows the link
+        except OSError:
+            scanned.files.append(entry.name) # Dangling link: move the link itself
+            return
+        if entry.is_dir():
+            scanned.dirs.append(entry.name) # Revisits are caught when the folder is listed
+            return
+        # Not recorded as seen: the real file, if found later, must still be organized itself
+        if target_stat.st_ino in self._seen_files.get(target_stat.st_dev, ()):
+            self.symlinks_skipped += 1 # Points at a file that is already organized
+            return
+        scanned.files.append(entry.name)
@@ -3,11 +3,12 @@ from tkinter import ttk, filedialog, messagebox
 import os
 import queue
 # Import only the class names here
-from src.core.organizer import FileOrganizer
+from src.core.job_manager import JobManager, FINISHED_STATES
 from src.core.log_manager import LogManager # Import LogManager class for type hinting
 from src.core.notification_manager import NotificationManager # Import NotificationManager class for type hinting
 from src.config.settings import SettingsManager
 from src.gui.preview_dialog import PreviewDialog # Import the PreviewDialog
+from src.core.preview_summary import format_summary
 
 class MainWindow(tk.Tk):
     """
@@ -18,7 +19,7 @@ class MainWindow(tk.Tk):
     def __init__(self, settings_manager: SettingsManager, app_log_manager: LogManager, app_notification_manager: NotificationManager):
         super().__init__()
         self.title("Super Smart File Organizer")
-        self.geometry("700x580") # Increased height slightly for better spacing
+        self.geometry("700x780") # Extra height for the preview summary and job list
         self.resizable(False, False) # Fixed size for simplicity
 
         # Apply a modern theme for better aesthetics
@@ -39,8 +40,9 @@ class MainWindow(tk.Tk):
         self.app_notification_manager = app_notification_manager
 
         self.log_queue = self.app_log_manager.get_queue() # Get the queue for UI updates
-        # Pass the log and notification managers to FileOrganizer
-        self.file_organizer = FileOrganizer(self.log_queue, self.settings_manager, self.app_log_manager, self.app_notification_manager)
+        # Every preview/organize run is submitted as a job; the JobManager creates a FileOrganizer per job
+        # and serializes jobs that touch the same folders
+        self.job_manager = JobManager(self.log_queue, self.settings_manager, self.app_log_manager, self.app_notification_manager)
 
         self._create_widgets()
         self._load_saved_settings()
@@ -116,12 +118,24 @@ class MainWindow(tk.Tk):
         self.progress_bar.grid(row=9, column=0, sticky="ew", pady=(15, 5)) # Increased pady
 
         self.status_label = ttk.Label(main_frame, text="Ready.")
-        self.status_label.grid(row=10, column=0, sticky="w", pady=(0, 15)) # Increased pady
+        self.status_label.grid(row=10, column=0, sticky="w", pady=(0, 5))
+
+        # Live preview totals (filled while a preview is running)
+        self.summary_label = ttk.Label(main_frame, text="", justify="left", wraplength=650, font=('Segoe UI', 9))
+        self.summary_label.grid(row=11, column=0, sticky="w", pady=(0, 10))
+
+        # Job list: one row per queued/running/finished job. Select rows to stop only those jobs.
+        ttk.Label(main_frame, text="Jobs:").grid(row=12, column=0, sticky="w", pady=(0, 2))
+        self.jobs_tree = ttk.Treeview(main_frame, columns=("mode", "status", "progress", "paths"), show="headings", height=4)
+        for column, heading, width in (("mode", "Mode", 80), ("status", "Status", 80), ("progress", "Progress", 90), ("paths", "Source -> Destination", 400)):
+            self.jobs_tree.heading(column, text=heading)
+            self.jobs_tree.column(column, width=width, stretch=(column == "paths"))
+        self.jobs_tree.grid(row=13, column=0, sticky="ew", pady=(0, 10))
 
         # Log Display Area
-        ttk.Label(main_frame, text="Activity Log:").grid(row=11, column=0, sticky="w", pady=(0, 2))
+        ttk.Label(main_frame, text="Activity Log:").grid(row=14, column=0, sticky="w", pady=(0, 2))
         log_frame = ttk.Frame(main_frame)
-        log_frame.grid(row=12, column=0, sticky="nsew")
+        log_frame.grid(row=15, column=0, sticky="nsew")
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
 
@@ -191,20 +205,18 @@ class MainWindow(tk.Tk):
         if not self._validate_paths(source_dir, destination_dir):
             return
 
-        self._set_ui_busy(True)
         self.status_label.config(text="Generating preview...")
-        self.progress_bar.config(mode="indeterminate") # Indeterminate for preview
-        self.progress_bar.start()
-
-        self.log_text.config(state="normal")
-        self.log_text.delete(1.0, tk.END)
-        self.log_text.config(state="disabled")
+        self.summary_label.config(text="")
+        self.progress_bar.config(mode="determinate") # Total grows while scanning, so show files done so far
+        self.progress_var.set(0)
 
         self.app_log_manager.info("Preview started...") # Log with the actual manager
 
-        self.file_organizer.organize_files_threaded(
+        job_id = self.job_manager.submit(
             source_dir, destination_dir, duplicate_handling, sort_by_date_format, preview_mode=True
         )
+        self.status_label.config(text=f"Preview submitted as {job_id}.")
+        self._set_ui_busy(True)
 
     def _start_organize(self):
         """Initiates the actual file organization process."""
@@ -224,39 +236,51 @@ class MainWindow(tk.Tk):
             self.status_label.config(text="Organization cancelled by user.")
             return
 
-        self._set_ui_busy(True)
         self.status_label.config(text="Starting organization...")
+        self.summary_label.config(text="")
         self.progress_bar.config(mode="determinate") # Determinate for actual progress
         self.progress_var.set(0) # Reset progress
 
-        self.log_text.config(state="normal")
-        self.log_text.delete(1.0, tk.END) # Clear previous logs
-        self.log_text.config(state="disabled")
-
         self.app_log_manager.info("Organization started...") # Log with the actual manager
 
-        self.file_organizer.organize_files_threaded(
+        job_id = self.job_manager.submit(
             source_dir, destination_dir, duplicate_handling, sort_by_date_format, preview_mode=False
         )
+        self.status_label.config(text=f"Organization submitted as {job_id}.")
+        self._set_ui_busy(True)
 
     def _stop_organize(self):
-        """Sends a stop signal to the file organizer thread."""
-        self.file_organizer.stop()
-        self._set_ui_busy(False) # UI becomes responsive immediately after stop signal
+        """Stops the jobs selected in the job list, or every active job if none is selected."""
+        selected_job_ids = self.jobs_tree.selection()
+        if selected_job_ids:
+            for job_id in selected_job_ids:
+                self.job_manager.cancel(job_id)
+        else:
+            self.job_manager.cancel_all()
         self.status_label.config(text="Stopping organization...")
         self.app_log_manager.info("Organization process requested to stop.") # Log with the actual manager
 
     def _set_ui_busy(self, is_busy):
-        """Enables/disables UI elements based on busy status."""
-        state = "disabled" if is_busy else "normal"
-        self.source_dir_entry.config(state=state)
-        self.destination_dir_entry.config(state=state)
-        self.preview_button.config(state=state)
-        self.organize_button.config(state=state)
+        """
+        Enables the Stop button while jobs are active. Inputs and the Preview/Organize
+        buttons stay enabled so further jobs can be queued; the JobManager serializes
+        jobs that touch the same folders.
+        """
         self.stop_button.config(state="normal" if is_busy else "disabled")
-        # To truly disable radio buttons and option menus:
-        # Loop through their parent frames' children and set state individually if needed.
-        # For this example, reliance on overall button disable/enable is sufficient for user flow.
+
+    def _update_job_row(self, job_info):
+        """Inserts or updates the job list row for a job_status message."""
+        job_id = job_info["job_id"]
+        values = ("Preview" if job_info["preview_mode"] else "Organize", job_info["status"],
+                  "" if not self.jobs_tree.exists(job_id) else self.jobs_tree.set(job_id, "progress"),
+                  f"{job_info['source_dir']} -> {job_info['destination_dir']}")
+        if self.jobs_tree.exists(job_id):
+            self.jobs_tree.item(job_id, values=values)
+        else:
+            self.jobs_tree.insert("", tk.END, iid=job_id, values=values)
+        statistics = job_info.get("statistics")
+        if job_info["status"] in FINISHED_STATES and statistics:
+            self.jobs_tree.set(job_id, "progress", f"{statistics['files_processed']}/{statistics['files_found']} files")
 
     def _check_log_queue(self):
         """
@@ -275,10 +299,17 @@ class MainWindow(tk.Tk):
                     self.log_text.insert(tk.END, message + "\n")
                     self.log_text.see(tk.END) # Auto-scroll to bottom
                     self.log_text.config(state="disabled")
+                elif msg_type == "job_status":
+                    self._update_job_row(message_item)
+                    self._set_ui_busy(bool(self.job_manager.get_active_jobs()))
+
                 elif msg_type == "progress":
                     current = message_item.get("current")
                     total = message_item.get("total")
                     status_message = message_item.get("message", "")
+                    job_id = message_item.get("job_id")
+                    if job_id and self.jobs_tree.exists(job_id):
+                        self.jobs_tree.set(job_id, "progress", f"{current}/{total}")
 
                     # Update progress bar and status label
                     if total > 0:
@@ -289,19 +320,24 @@ class MainWindow(tk.Tk):
                         self.progress_var.set(0)
                         self.status_label.config(text=status_message)
 
-                    # When process is finished, reset UI state
-                    if current == total:
-                        self._set_ui_busy(False)
+                    # When a run is finished, reset UI state (the job_status message updates the Stop button)
+                    if message_item.get("done"):
                         self.progress_bar.stop()
                         if not status_message: # If no specific final message, set a default
                             self.status_label.config(text="Ready.")
 
+                elif msg_type == "preview_summary":
+                    self.summary_label.config(text=format_summary(message_item["summary"]))
+
                 elif msg_type == "preview_results":
                     actions = message_item.get("actions", [])
-                    preview_dialog = PreviewDialog(self, actions)
+                    summary = message_item.get("summary")
+                    if summary:
+                        self.summary_label.config(text=format_summary(summary))
+                    preview_dialog = PreviewDialog(self, actions, summary)
                     # The preview_dialog handles its own grab_set, wait_window, etc.
                     # so we just need to ensure UI state is reset after it closes.
-                    self._set_ui_busy(False)
+                    self._set_ui_busy(bool(self.job_manager.get_active_jobs()))
                     self.progress_bar.stop()
                     self.status_label.config(text="Preview ready.")
 
@@ -312,7 +348,7 @@ class MainWindow(tk.Tk):
                 # This error is usually internal to the GUI's queue handling.
                 print(f"Error processing GUI queue message: {e}")
                 self.app_log_manager.error(f"Error processing GUI queue message: {e}") # Log to file as well
-                self._set_ui_busy(False) # Attempt to unfreeze UI
+                self._set_ui_busy(bool(self.job_manager.get_active_jobs())) # Attempt to unfreeze UI
                 self.progress_bar.stop()
                 break # Stop processing to avoid infinite loop on error
 
@@ -1,11 +1,12 @@
 import tkinter as tk
 from tkinter import ttk
+from src.core.preview_summary import format_summary
 
 class PreviewDialog(tk.Toplevel):
     """
     A Toplevel window to display the proposed file organization actions in preview mode.
     """
-    def __init__(self, parent, actions):
+    def __init__(self, parent, actions, summary=None):
         super().__init__(parent)
         self.title("Preview Organization Actions")
         self.geometry("900x600") # Slightly wider for action descriptions
@@ -22,6 +23,7 @@ class PreviewDialog(tk.Toplevel):
         self.rowconfigure(0, weight=1)
 
         self.actions = actions
+        self.summary = summary # Aggregate totals from PreviewSummary.snapshot(), if available
 
         self._create_widgets()
         self._populate_listbox()
@@ -38,14 +40,18 @@ class PreviewDialog(tk.Toplevel):
         main_frame = ttk.Frame(self, padding="15")
         main_frame.grid(row=0, column=0, sticky="nsew")
         main_frame.columnconfigure(0, weight=1)
-        main_frame.rowconfigure(1, weight=1) # Listbox row
+        main_frame.rowconfigure(2, weight=1) # Listbox row
+
+        # Summary totals above the detailed list
+        if self.summary:
+            ttk.Label(main_frame, text=format_summary(self.summary), justify="left", wraplength=850).grid(row=0, column=0, sticky="nw", pady=(0, 10))
 
         # Label
-        ttk.Label(main_frame, text="Proposed Actions:").grid(row=0, column=0, sticky="nw", pady=(0, 5))
+        ttk.Label(main_frame, text="Proposed Actions:").grid(row=1, column=0, sticky="nw", pady=(0, 5))
 
         # Scrollable Listbox (using Text widget for better display of long lines)
         list_frame = ttk.Frame(main_frame)
-        list_frame.grid(row=1, column=0, sticky="nsew")
+        list_frame.grid(row=2, column=0, sticky="nsew")
         list_frame.columnconfigure(0, weight=1)
         list_frame.rowconfigure(0, weight=1)
 
@@ -64,7 +70,7 @@ class PreviewDialog(tk.Toplevel):
         self.text_display.config(xscrollcommand=scrollbar_x.set)
 
         # Close button
-        ttk.Button(main_frame, text="Close", command=self.destroy).grid(row=2, column=0, pady=(15, 0))
+        ttk.Button(main_frame, text="Close", command=self.destroy).grid(row=3, column=0, pady=(15, 0))
 
     def _populate_listbox(self):
         """Populates the text_display with the action list."""
@@ -0,0 +1,127 @@
+"""
+Checks that notifications never slow a run down: the organizer only queues them and a
+background dispatcher delivers them. Run with: python -m unittest tests.test_notification_dispatch
+"""
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.settings import SettingsManager
+from src.core.file_utils import set_global_log_manager
+from src.core.log_manager import LogManager
+from src.core.notification_manager import NotificationManager
+from src.core.organizer import FileOrganizer
+
+BACKEND_DELAY = 3 # Seconds the slow stub backend blocks per notification
+
+
+class TemporarySettings(SettingsManager):
+    """Default settings that are never written to config.json."""
+    def __init__(self, config_file):
+        self.config_file = config_file
+        self._set_default_settings()
+
+    def _save_settings(self):
+        pass
+
+
+class RecordingNotifier:
+    """Stub desktop backend: records each call, optionally blocking like a stuck D-Bus."""
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, title, message, app_name, timeout):
+        time.sleep(self.delay)
+        with self.lock:
+            self.calls.append((title, message))
+
+
+class NotificationDispatchTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        self.log_manager = LogManager(os.path.join(self.root, "organizer_log.txt"))
+        set_global_log_manager(self.log_manager)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _make_source(self, name, file_count=200):
+        source = os.path.join(self.root, name)
+        os.makedirs(os.path.join(source, "nested"))
+        for i in range(file_count):
+            folder = source if i % 2 else os.path.join(source, "nested")
+            with open(os.path.join(folder, f"file{i}.{('txt', 'jpg', 'mp3', 'zip')[i % 4]}"), "w") as f:
+                f.write("x" * i)
+        return source
+
+    def _organize(self, name, notifier):
+        """Organizes a fresh tree with the given backend. Returns the run's duration in seconds."""
+        source = self._make_source(name)
+        destination = os.path.join(self.root, name + "_sorted")
+        log_queue = self.log_manager.get_queue()
+        settings = TemporarySettings(os.path.join(self.root, "config.json"))
+        organizer = FileOrganizer(log_queue, settings, self.log_manager, notifier)
+        start_time = time.monotonic()
+        organizer._organize_files(source, destination, "rename", "None", False)
+        elapsed = time.monotonic() - start_time
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(destination)), 200)
+        return elapsed
+
+    def test_slow_backend_does_not_slow_the_run(self):
+        fast_backend = RecordingNotifier()
+        fast_manager = NotificationManager(notifier=fast_backend, coalesce_seconds=0)
+        fast_elapsed = self._organize("fast", fast_manager)
+        self.assertTrue(fast_manager.close(timeout=10))
+
+        slow_backend = RecordingNotifier(delay=BACKEND_DELAY)
+        slow_manager = NotificationManager(notifier=slow_backend, event_timeout=BACKEND_DELAY + 5, coalesce_seconds=0)
+        slow_elapsed = self._organize("slow", slow_manager)
+
+        # The run returns long before the backend does, in about the time a run with a no-op backend takes
+        self.assertLess(slow_elapsed, BACKEND_DELAY / 2)
+        self.assertLess(slow_elapsed, fast_elapsed + 1.0)
+        self.assertEqual(slow_backend.calls, [])
+        # ...and the notifications are still delivered afterwards
+        self.assertTrue(slow_manager.close(timeout=4 * (BACKEND_DELAY + 5)))
+        self.assertEqual([title for title, _ in slow_backend.calls], [title for title, _ in fast_backend.calls])
+        self.assertIn("Organization Complete", [title for title, _ in slow_backend.calls])
+
+    def test_malformed_hook_command_keeps_dispatcher_alive(self):
+        backend = RecordingNotifier()
+        manager = NotificationManager(notifier=backend, post_run_command='notify-send "unbalanced', coalesce_seconds=0)
+        manager.send_run_finished({"moved": 1})
+        self.assertTrue(manager.close(timeout=10))
+        manager.send_run_finished({"moved": 2})
+        manager.send_notification("Organization Complete", "done")
+        self.assertTrue(manager.close(timeout=10))
+        self.assertEqual(backend.calls, [("Organization Complete", "done")])
+
+    def test_burst_coalesces_per_title_and_keeps_errors(self):
+        backend = RecordingNotifier()
+        manager = NotificationManager(notifier=backend, coalesce_seconds=0.5)
+        manager.send_notification("File Organizer", "Scanning started")
+        manager.send_notification("Organizer Error", "Source directory not found!", is_error=True)
+        manager.send_notification("File Organizer", "Scanning finished")
+        manager.send_notification("Organizer Error", "Destination path is not a directory!", is_error=True)
+        manager.send_notification("Organization Complete", "done")
+        self.assertTrue(manager.close(timeout=10))
+        self.assertEqual(backend.calls, [
+            ("File Organizer", "Scanning finished (+1 earlier)"),
+            ("Organizer Error", "Source directory not found!"),
+            ("Organizer Error", "Destination path is not a directory!"),
+            ("Organization Complete", "done"),
+        ])
+        self.assertEqual(manager.notifications_coalesced, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()